@@ -1,7 +1,7 @@
-from flask import Flask, request, render_template, jsonify, url_for, redirect, session, send_file, current_app, flash
+from flask import Flask, request, render_template, jsonify, url_for, redirect, session, send_file, current_app, flash, g, abort, has_request_context
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, HRFlowable
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from io import BytesIO
@@ -15,6 +15,24 @@ import logging
 from logging.handlers import RotatingFileHandler
 from datetime import datetime, timedelta, timezone
 import random
+import gzip
+import hashlib
+import hmac
+import json
+import re
+import sys
+import threading
+import tracemalloc
+import zlib
+import click
+from contextlib import contextmanager
+from xml.sax.saxutils import escape
+from jinja2 import FileSystemBytecodeCache
+
+try:
+    import brotli  # optional, enables "br" response encoding
+except ImportError:
+    brotli = None
 
 
 load_dotenv()
@@ -34,13 +52,44 @@ file_handler.setLevel(logging.INFO)
 
 
 SQLITE_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+DB_PATH = "database.db"
+SHARD_FOLDER = "db_shards"
+# 0 keeps everything in database.db, N>0 spreads quizzes and class results over N shard files
+DB_SHARDS = int(os.getenv('ADAM_DB_SHARDS', '0'))
+ARCHIVE_FOLDER = "archive"
+ARCHIVE_INDEX = os.path.join(ARCHIVE_FOLDER, "index.db")
+EXPIRY_SWEEP_INTERVAL = 60
+SESSION_MINUTES = 50
 UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploaded_pdfs') 
 ALLOWED_EXTENSIONS = {'pdf'}
 
+# static asset caching / response compression
+ASSET_MAX_AGE = 365 * 24 * 60 * 60
+COMPRESSIBLE_MIMETYPES = {'text/html', 'application/json', 'text/css', 'text/javascript', 'application/javascript'}
+COMPRESS_MIN_SIZE = 500
+# compiled templates survive restarts here
+JINJA_CACHE_FOLDER = "jinja_cache"
+
+# quiz delivery
+QUIZ_CACHE_TTL = 60
+QUIZ_CACHE_MAX = 256
+QUIZ_PAGE_SIZE = 1
+QUIZ_MAX_PAGE_SIZE = 10
+# submission tokens remembered in memory, so retried/duplicate posts skip the database
+RECENT_SUBMISSIONS_MAX = 10000
+
+# request profiling, admin only and not hooked in at all unless a token is set
+PROFILE_TOKEN = os.getenv('ADAM_PROFILE_TOKEN')
+PROFILE_FOLDER = "profiles"
+PROFILE_SETTINGS = os.path.join(PROFILE_FOLDER, "settings.json")
+PROFILE_INTERVAL = 0.005
+PROFILE_KEEP = 100
+
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 
-def check_expiry(date):
+def check_expiry(date, minutes=SESSION_MINUTES):
+    # True once date is more than minutes in the past, pass 0 for an explicit expiry time
     app.logger.info("Validating Expiry")
     try:
         stored_date = datetime.strptime(date, SQLITE_DATETIME_FORMAT)
@@ -48,7 +97,7 @@ def check_expiry(date):
         # Attach UTC timezone (because DB stored the time in UTC)
         stored_date = stored_date.replace(tzinfo=timezone.utc)
 
-        limit = datetime.now(timezone.utc) - timedelta(minutes=50)
+        limit = datetime.now(timezone.utc) - timedelta(minutes=minutes)
 
         return stored_date < limit
 
@@ -57,27 +106,234 @@ def check_expiry(date):
         return False
 
 
+QUIZ_SCHEMA = '''CREATE TABLE IF NOT EXISTS quiz (
+            id text PRIMARY KEY,
+            quizJSON text NOT NULL,
+            subject text NOT NULL,
+            host text NOT NULL,
+            classDB text NOT NULL
+)'''
+
+USERS_SCHEMA = '''CREATE TABLE IF NOT EXISTS users (
+        id text PRIMARY KEY,
+        name text NOT NULL,
+        email text NOT NULL,
+        subject text NOT NULL,
+        classDB text NOT NULL,
+        created_on DATE NOT NULL,
+        quizID text NOT NULL,
+        quiz_ended BOOLEAN DEFAULT FALSE,
+        expires_on DATE,
+        FOREIGN KEY (quizID) REFERENCES {quiz_table}(id)
+        )'''
+
+# a student's attempt lives next to its class results, the session cookie only carries the token
+ATTEMPTS_SCHEMA = '''CREATE TABLE IF NOT EXISTS attempts (
+            token text PRIMARY KEY,
+            quizID text NOT NULL,
+            classDB text NOT NULL,
+            question_order text NOT NULL,
+            created_on DATE NOT NULL
+)'''
+
+ATTEMPT_ANSWERS_SCHEMA = '''CREATE TABLE IF NOT EXISTS attempt_answers (
+            token text NOT NULL,
+            position integer NOT NULL,
+            choice integer NOT NULL,
+            correct integer NOT NULL,
+            PRIMARY KEY (token, position)
+)'''
+
+# catalog-only table telling which shard (via classDB) holds a quiz
+QUIZ_CATALOG_SCHEMA = '''CREATE TABLE IF NOT EXISTS quiz_catalog (
+            id text PRIMARY KEY,
+            classDB text NOT NULL
+)'''
+
+
+def shard_path(shard):
+    return os.path.join(SHARD_FOLDER, f"shard_{shard:02d}.db")
+
+
+def shard_for(key):
+    # crc32 is stable across processes and restarts, unlike hash()
+    return zlib.crc32(key.encode()) % DB_SHARDS
+
+
+def db_connect(key=None):
+    # key=None is the catalog (users, quiz index); a classDB key is the shard owning that class and its quiz
+    if key is None or not DB_SHARDS:
+        return sqlite3.connect(DB_PATH)
+    return sqlite3.connect(shard_path(shard_for(key)))
+
+
+# where each archived session sits inside the per-day gzip files
+ARCHIVE_INDEX_SCHEMA = '''CREATE TABLE IF NOT EXISTS archive_index (
+            teacher_id text PRIMARY KEY,
+            quiz_id text NOT NULL,
+            classDB text NOT NULL,
+            day text NOT NULL,
+            offset integer NOT NULL,
+            length integer NOT NULL
+)'''
+
+
+def storage_paths():
+    return [DB_PATH] + [shard_path(shard) for shard in range(DB_SHARDS)]
+
+
+def enable_incremental_vacuum(path, vacuum=False):
+    # the mode sticks if set before the first table is created, existing files need a full VACUUM
+    with sqlite3.connect(path) as conn:
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            if vacuum:
+                conn.execute('VACUUM')
+        return conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+
+
+def add_completed_column(path):
+    # class tables created before submissions were upserted lack the completed flag
+    with sqlite3.connect(path) as conn:
+        tables = [row[0] for row in conn.execute("SELECT name from sqlite_master WHERE type='table' AND name LIKE 'CLS_%'")]
+        for table in tables:
+            columns = [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+            if 'completed' not in columns:
+                conn.execute(f'ALTER TABLE {table} ADD COLUMN completed integer NOT NULL DEFAULT 1')
+
+
+def add_expires_on_column():
+    # users tables created before a session could carry its own expiry (NULL means SESSION_MINUTES)
+    with db_connect() as conn:
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(users)')]
+        if 'expires_on' not in columns:
+            conn.execute('ALTER TABLE users ADD COLUMN expires_on DATE')
+
+
+def init_storage():
+    if DB_SHARDS:
+        os.makedirs(SHARD_FOLDER, exist_ok=True)
+    for path in storage_paths():
+        if not enable_incremental_vacuum(path):
+            app.logger.info(f"{path} cannot shrink yet, run 'flask --app ADAM enable-incremental-vacuum' once")
+    with db_connect() as conn:
+        if DB_SHARDS:
+            conn.execute(USERS_SCHEMA.format(quiz_table='quiz_catalog'))
+            conn.execute(QUIZ_CATALOG_SCHEMA)
+        else:
+            conn.execute(USERS_SCHEMA.format(quiz_table='quiz'))
+            conn.execute(QUIZ_SCHEMA)
+            conn.execute(ATTEMPTS_SCHEMA)
+            conn.execute(ATTEMPT_ANSWERS_SCHEMA)
+    if DB_SHARDS:
+        for shard in range(DB_SHARDS):
+            with sqlite3.connect(shard_path(shard)) as conn:
+                conn.execute(QUIZ_SCHEMA)
+                conn.execute(ATTEMPTS_SCHEMA)
+                conn.execute(ATTEMPT_ANSWERS_SCHEMA)
+    add_expires_on_column()
+    for path in storage_paths():
+        add_completed_column(path)
+    os.makedirs(ARCHIVE_FOLDER, exist_ok=True)
+    with sqlite3.connect(ARCHIVE_INDEX) as conn:
+        conn.execute(ARCHIVE_INDEX_SCHEMA)
+
+
+def archive_session(index, user_dict):
+    # append one gzip member per session, so a single record can be read back without the rest of the day
+    try:
+        class_data = get_class_data(user_dict['classDB'])
+    except sqlite3.OperationalError:
+        # the class table only exists once a student has submitted
+        app.logger.info(f"No class table for {user_dict['classDB']}")
+        class_data = None
+    quiz_data = get_quiz_data(user_dict['quizID'])
+    record = {
+        'teacher': user_dict,
+        'quiz': quiz_data,
+        'results': class_data or [],
+        'archived_on': datetime.now(timezone.utc).strftime(SQLITE_DATETIME_FORMAT),
+    }
+    member = gzip.compress(json.dumps(record).encode() + b"\n")
+    day = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    with open(os.path.join(ARCHIVE_FOLDER, f"{day}.jsonl.gz"), 'ab') as f:
+        offset = f.seek(0, os.SEEK_END)
+        f.write(member)
+    index.execute('''INSERT INTO archive_index(teacher_id, quiz_id, classDB, day, offset, length)
+                     VALUES(?,?,?,?,?,?)''',
+                  (user_dict['id'], user_dict['quizID'], user_dict['classDB'], day, offset, len(member)))
+
+
+def get_archived_session(teacher_id):
+    if not os.path.exists(ARCHIVE_INDEX):
+        return None
+    with sqlite3.connect(ARCHIVE_INDEX) as conn:
+        row = conn.execute('SELECT day, offset, length from archive_index WHERE teacher_id = ?', (teacher_id,)).fetchone()
+    if row is None:
+        return None
+    day, offset, length = row
+    app.logger.info(f"Reading archived session {teacher_id} from {day}")
+    with open(os.path.join(ARCHIVE_FOLDER, f"{day}.jsonl.gz"), 'rb') as f:
+        f.seek(offset)
+        return json.loads(gzip.decompress(f.read(length)))
+
+
+def purge_session(user_dict):
+    with db_connect() as conn:
+        sql = "DELETE from users where id= ?"
+        app.logger.info("Deleting user")
+        conn.execute(sql, (user_dict['id'],))
+    app.logger.info("Deleting quiz")
+    remove_quiz(user_dict['quizID'], user_dict['classDB'])
+    with db_connect(user_dict['classDB']) as conn:
+        sql = f"DROP table IF EXISTS {user_dict['classDB']}"
+        app.logger.info("Deleting class")
+        conn.execute(sql)
+        conn.execute('DELETE from attempt_answers WHERE token IN (SELECT token from attempts WHERE classDB = ?)',
+                     (user_dict['classDB'],))
+        conn.execute('DELETE from attempts WHERE classDB = ?', (user_dict['classDB'],))
+
+
+def compact_storage():
+    for path in storage_paths():
+        with sqlite3.connect(path) as conn:
+            # execute() steps the pragma once and frees a single page, executescript() runs it to completion
+            conn.executescript('PRAGMA incremental_vacuum;')
+
+
+_last_expiry_sweep = 0
+
+
 def del_expired():
-    app.logger.info("Deleting expired users")
+    global _last_expiry_sweep
+    if time.time() - _last_expiry_sweep < EXPIRY_SWEEP_INTERVAL:
+        return
+    _last_expiry_sweep = time.time()
+    app.logger.info("Archiving expired users")
     try:
-        with sqlite3.connect("database.db") as conn:
+        with db_connect() as conn:
             app.logger.info("Connected with database")
             cursor = conn.cursor()
             cursor.execute("SELECT * from users")
             app.logger.info("Fetched users data")
-            data = cursor.fetchall()
-            for i in data:
-                if check_expiry(i[-3]):
-                    app.logger.info(f"User Expired: \nID: {i[0]}, Class: {i[4]}, Quiz ID: {i[6]}")
-                    sql = "DELETE from users where id= ?"
-                    app.logger.info("Deleting user")
-                    cursor.execute(sql, (i[0],))
-                    sql = "DELETE from quiz where id= ?"
-                    app.logger.info("Deleting quiz")
-                    cursor.execute(sql, (i[6],))
-                    sql = f"DROP table {i[4]}"
-                    app.logger.info("Deleting class")
-                    cursor.execute(sql)
+            column_names = [description[0] for description in cursor.description]
+            data = [dict(zip(column_names, row)) for row in cursor.fetchall()]
+        expired = [user for user in data
+                   if (check_expiry(user['expires_on'], 0) if user['expires_on'] else check_expiry(user['created_on']))]
+        for user in expired:
+            app.logger.info(f"User Expired: \nID: {user['id']}, Class: {user['classDB']}, Quiz ID: {user['quizID']}")
+            try:
+                # the index lock keeps concurrent workers from archiving the same session twice
+                with sqlite3.connect(ARCHIVE_INDEX, timeout=30) as index:
+                    index.execute('BEGIN IMMEDIATE')
+                    if index.execute('SELECT 1 from archive_index WHERE teacher_id = ?', (user['id'],)).fetchone() is None:
+                        archive_session(index, user)
+                purge_session(user)
+            except (sqlite3.Error, OSError) as e:
+                # leave this session for the next sweep instead of stopping the rest
+                app.logger.error(f"Failed to expire {user['id']}: {e}")
+        if expired:
+            compact_storage()
     except sqlite3.OperationalError as e:
         app.logger.error("Failed to open database:", e)
 
@@ -94,25 +350,373 @@ app = Flask(__name__)
 app.logger.addHandler(file_handler)
 app.logger.setLevel(logging.INFO)
 app.logger.info('Application startup')
+os.makedirs(JINJA_CACHE_FOLDER, exist_ok=True)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(JINJA_CACHE_FOLDER)
+init_storage()
+
+
+@app.cli.command('enable-incremental-vacuum')
+def enable_incremental_vacuum_command():
+    """Rewrite existing databases once so expired sessions free disk space."""
+    # a full VACUUM locks the file, run it while the app is stopped
+    for path in storage_paths():
+        try:
+            converted = enable_incremental_vacuum(path, vacuum=True)
+        except sqlite3.OperationalError as e:
+            click.echo(f"{path}: skipped ({e})", err=True)
+            continue
+        click.echo(f"{path}: {'incremental' if converted else 'unchanged'}")
+
+
+_asset_digests = {}
+_compressed_assets = {}
+_quiz_cache = {}
+_recent_submissions = {}
+_page_cache = {}
+
+
+def asset_url(filename):
+    # url for a file under static/ with its content hash as cache buster, None if missing
+    digest = _asset_digests.get(filename)
+    if digest is None or app.debug:
+        path = os.path.join(app.static_folder, filename)
+        if not os.path.isfile(path):
+            return None
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:12]
+        _asset_digests[filename] = digest
+    return url_for('static', filename=filename, v=digest)
+
+app.add_template_global(asset_url)
+
+
+def choose_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress_body(body, encoding, level):
+    # level is "static" (compressed once, cached) or "dynamic" (per request)
+    if encoding == 'br':
+        return brotli.compress(body, quality=11 if level == 'static' else 4)
+    return gzip.compress(body, compresslevel=9 if level == 'static' else 6)
+
+
+@app.after_request
+def cache_and_compress(response):
+    is_static = request.endpoint == 'static'
+    if is_static and ('v' in request.args or request.path.startswith('/static/vendor/')):
+        # fingerprinted or versioned vendor files never change under the same url
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = ASSET_MAX_AGE
+        response.cache_control.immutable = True
+
+    if (response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or response.status_code in (204, 206, 304)
+            or 'Content-Encoding' in response.headers
+            or (response.is_streamed and not is_static)):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+
+    if is_static:
+        key = (request.path, response.get_etag()[0], encoding)
+        body = _compressed_assets.get(key)
+        if body is None:
+            response.direct_passthrough = False
+            body = compress_body(response.get_data(), encoding, 'static')
+            _compressed_assets[key] = body
+        if hasattr(response.response, 'close'):
+            response.response.close()
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return response
+        body = compress_body(data, encoding, 'dynamic')
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    etag, _ = response.get_etag()
+    if etag:
+        # the encoded body differs byte-wise, but If-None-Match uses weak comparison
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def cached_page(template, status=200, **context):
+    # for pages whose html only depends on the arguments: render once, keep every encoding's bytes
+    if '_flashes' in session:
+        # a pending flash message changes the page, render it normally once
+        return render_template(template, **context), status
+    key = (template, status, tuple(sorted(context.items())))
+    entry = _page_cache.get(key)
+    # is_up_to_date compares the template file's mtime with the one it was loaded from
+    if entry is None or app.debug or not entry['template'].is_up_to_date:
+        compiled = app.jinja_env.get_template(template)
+        if not compiled.is_up_to_date:
+            # templates are not auto-reloaded outside debug mode, load the edited file directly
+            compiled = app.jinja_env.loader.load(app.jinja_env, template, app.jinja_env.make_globals(None))
+        html = render_template(compiled, **context).encode()
+        entry = {'template': compiled, 'etag': hashlib.sha256(html).hexdigest()[:16], 'bodies': {None: html}}
+        _page_cache[key] = entry
+
+    encoding = choose_encoding()
+    if len(entry['bodies'][None]) < COMPRESS_MIN_SIZE:
+        encoding = None
+    body = entry['bodies'].get(encoding)
+    if body is None:
+        body = compress_body(entry['bodies'][None], encoding, 'static')
+        entry['bodies'][encoding] = body
+
+    response = app.response_class(body, status=status, mimetype='text/html')
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if status == 200:
+        # browsers revalidate every time, an unchanged page costs a 304 with no body
+        response.cache_control.no_cache = True
+        response.set_etag(entry['etag'], weak=True)
+        response.make_conditional(request)
+    return response
+
+
+# endpoints to always profile and the fraction of other requests to sample, changeable at runtime
+profile_settings = {
+    'routes': {r.strip() for r in os.getenv('ADAM_PROFILE_ROUTES', '').split(',') if r.strip()},
+    'rate': float(os.getenv('ADAM_PROFILE_RATE', '0')),
+    'mtime': None,
+}
+_tracemalloc_users = {'count': 0, 'resets': 0, 'lock': threading.Lock()}
+
+
+def is_admin():
+    # header only, so the token stays out of access logs and browser history
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(PROFILE_TOKEN) and hmac.compare_digest(token.encode(), PROFILE_TOKEN.encode())
+
+
+def load_profile_settings():
+    # settings posted to any worker are shared through PROFILE_SETTINGS, re-read whenever the file changes
+    try:
+        mtime = os.stat(PROFILE_SETTINGS).st_mtime_ns
+    except OSError:
+        return
+    if mtime == profile_settings['mtime']:
+        return
+    try:
+        with open(PROFILE_SETTINGS) as f:
+            data = json.load(f)
+        profile_settings['routes'] = {str(r) for r in data['routes']}
+        profile_settings['rate'] = float(data['rate'])
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        app.logger.error(f"Failed to read profiling settings: {e}")
+        return
+    profile_settings['mtime'] = mtime
+
+
+def save_profile_settings(routes, rate):
+    os.makedirs(PROFILE_FOLDER, exist_ok=True)
+    # write then rename, so other workers never read a half-written file
+    temp = f"{PROFILE_SETTINGS}.{os.getpid()}.tmp"
+    with open(temp, 'w') as f:
+        json.dump({'routes': sorted(routes), 'rate': rate}, f)
+    os.replace(temp, PROFILE_SETTINGS)
+
+
+def sample_stacks(thread_id, stop, stacks):
+    # wall-clock sampler for one request thread, counts stacks in flamegraph "folded" form
+    while not stop.wait(PROFILE_INTERVAL):
+        frame = sys._current_frames().get(thread_id)
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        if names:
+            stack = ';'.join(reversed(names))
+            stacks[stack] = stacks.get(stack, 0) + 1
+
+
+def start_profile():
+    load_profile_settings()
+    if request.endpoint in ('static', 'profiles', 'download_profile'):
+        return
+    if not (request.endpoint in profile_settings['routes']
+            or random.random() < profile_settings['rate']
+            or ('X-Profile' in request.headers and is_admin())):
+        return
+    stop = threading.Event()
+    stacks = {}
+    sampler = threading.Thread(target=sample_stacks, args=(threading.get_ident(), stop, stacks), daemon=True)
+    g.profile = {'stop': stop, 'stacks': stacks, 'sampler': sampler, 'memory': [], 'started': time.perf_counter()}
+    sampler.start()
+
+
+def stop_profile(exc):
+    profile = g.pop('profile', None)
+    if profile is None:
+        return
+    profile['stop'].set()
+    profile['sampler'].join()
+    duration = time.perf_counter() - profile['started']
+    profile_id = f"{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')}_{request.endpoint}_{os.urandom(3).hex()}"
+    meta = {
+        'id': profile_id,
+        'endpoint': request.endpoint,
+        'method': request.method,
+        'path': request.path,
+        'duration_ms': round(duration * 1000, 1),
+        'samples': sum(profile['stacks'].values()),
+        'error': repr(exc) if exc else None,
+        'memory': profile['memory'],
+    }
+    try:
+        os.makedirs(PROFILE_FOLDER, exist_ok=True)
+        with open(os.path.join(PROFILE_FOLDER, f"{profile_id}.folded"), 'w') as f:
+            for stack, count in profile['stacks'].items():
+                f.write(f"{stack} {count}\n")
+        # the .json is what the listing reads, it appears in one rename once the .folded file is complete
+        temp = os.path.join(PROFILE_FOLDER, f"{profile_id}.json.tmp")
+        with open(temp, 'w') as f:
+            json.dump(meta, f)
+        os.replace(temp, os.path.join(PROFILE_FOLDER, f"{profile_id}.json"))
+        saved = sorted(name[:-5] for name in os.listdir(PROFILE_FOLDER)
+                       if name.endswith('.json') and name != os.path.basename(PROFILE_SETTINGS))
+        for old in saved[:-PROFILE_KEEP]:
+            for ext in ('.json', '.folded'):
+                os.remove(os.path.join(PROFILE_FOLDER, old + ext))
+    except OSError as e:
+        app.logger.error(f"Failed to save profile {profile_id}: {e}")
+        return
+    app.logger.info(f"Profiled {request.method} {request.path} in {meta['duration_ms']} ms, saved as {profile_id}")
+
+
+@contextmanager
+def memory_snapshot(label):
+    # tracemalloc diff around a block, recorded on the current request's profile if there is one
+    profile = g.get('profile') if PROFILE_TOKEN and has_request_context() else None
+    if profile is None:
+        yield
+        return
+    with _tracemalloc_users['lock']:
+        if _tracemalloc_users['count'] == 0:
+            tracemalloc.start()
+        _tracemalloc_users['count'] += 1
+        # the peak is process-wide, count resets so an overlapping snapshot can tell its peak was cleared
+        _tracemalloc_users['resets'] += 1
+        resets = _tracemalloc_users['resets']
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+    before = tracemalloc.take_snapshot()
+    try:
+        yield
+    finally:
+        with _tracemalloc_users['lock']:
+            peak = tracemalloc.get_traced_memory()[1] if _tracemalloc_users['resets'] == resets else None
+        after = tracemalloc.take_snapshot()
+        with _tracemalloc_users['lock']:
+            _tracemalloc_users['count'] -= 1
+            if _tracemalloc_users['count'] == 0:
+                tracemalloc.stop()
+        diff = after.compare_to(before, 'lineno')
+        profile['memory'].append({
+            'label': label,
+            'peak_bytes': peak - baseline if peak is not None else None,
+            'net_bytes': sum(stat.size_diff for stat in diff),
+            'top': [{'where': str(stat.traceback), 'size_diff': stat.size_diff, 'count_diff': stat.count_diff}
+                    for stat in diff[:10]],
+        })
+
+
+if PROFILE_TOKEN:
+    app.before_request(start_profile)
+    app.teardown_request(stop_profile)
+
+
+@app.route('/admin/profiles/', methods=['GET', 'POST'])
+def profiles():
+    if not PROFILE_TOKEN:
+        abort(404)
+    if not is_admin():
+        abort(403)
+    if request.method == 'POST':
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'success': False, 'message': 'Invalid profiling settings.'}), 400
+        try:
+            rate = float(data.get('rate', profile_settings['rate']))
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'message': 'Invalid profiling settings.'}), 400
+        routes = data.get('routes', sorted(profile_settings['routes']))
+        if not isinstance(routes, list) or not all(isinstance(r, str) for r in routes):
+            return jsonify({'success': False, 'message': 'Routes must be a list of endpoint names.'}), 400
+        routes = set(routes)
+        if not 0 <= rate <= 1:
+            return jsonify({'success': False, 'message': 'Rate must be between 0 and 1.'}), 400
+        try:
+            save_profile_settings(routes, rate)
+        except OSError as e:
+            app.logger.error(f"Failed to save profiling settings: {e}")
+            return jsonify({'success': False, 'message': 'Could not save profiling settings.'}), 500
+        load_profile_settings()
+        app.logger.info(f"Profiling set to routes {sorted(routes)} and rate {rate}")
+
+    saved = []
+    if os.path.isdir(PROFILE_FOLDER):
+        for name in sorted(os.listdir(PROFILE_FOLDER), reverse=True):
+            if name.endswith('.json') and name != os.path.basename(PROFILE_SETTINGS):
+                try:
+                    with open(os.path.join(PROFILE_FOLDER, name)) as f:
+                        meta = json.load(f)
+                except (OSError, ValueError) as e:
+                    # pruned by another worker meanwhile, or left half-written by an older version
+                    app.logger.warning(f"Skipping profile {name}: {e}")
+                    continue
+                meta['download'] = url_for('download_profile', profile_id=meta['id'])
+                saved.append(meta)
+    return jsonify({
+        'success': True,
+        'settings': {'routes': sorted(profile_settings['routes']), 'rate': profile_settings['rate']},
+        'profiles': saved,
+    })
+
+
+@app.route('/admin/profiles/<profile_id>.folded')
+def download_profile(profile_id):
+    if not PROFILE_TOKEN:
+        abort(404)
+    if not is_admin():
+        abort(403)
+    path = os.path.join(PROFILE_FOLDER, f"{secure_filename(profile_id)}.folded")
+    if not os.path.isfile(path):
+        abort(404)
+    return send_file(os.path.abspath(path), mimetype='text/plain', as_attachment=True, download_name=f"{profile_id}.folded")
 
 # 404 error
 @app.errorhandler(404)
 def page_not_found(e):
-    app.logger.error(f'404 Error: {e}')
-    
-    return render_template('error.html', error_code=404, error_message="Page Not Found"), 404
+    # scanners and stale links hit this constantly, keep it out of the log unless debugging
+    app.logger.debug(f'404 Error: {e}')
+    return cached_page('error.html', 404, error_code=404, error_message="Page Not Found")
 
 # internal Server Error
 @app.errorhandler(500)
 def internal_server_error(e):
     app.logger.error(f'500 Error: {e}')
-    return render_template('error.html', error_code=500, error_message="Internal Server Error"), 500
+    return cached_page('error.html', 500, error_code=500, error_message="Internal Server Error")
 
 # other common errors
 @app.errorhandler(403)
 def forbidden_error(e):
-    app.logger.warning(f'403 Error: {e}')
-    return render_template('error.html', error_code=403, error_message="Access Forbidden"), 403
+    app.logger.debug(f'403 Error: {e}')
+    return cached_page('error.html', 403, error_code=403, error_message="Access Forbidden")
 
 
 
@@ -122,28 +726,42 @@ def main():
     app.logger.info("Checking expired users")
     del_expired()
     app.logger.info('Deleted expired users')
-    return render_template("index.html")
+    return cached_page("index.html")
 
 @app.route('/instructions/')
 def instructions():
     app.logger.info("Displaying application guide.")
-    return render_template("instructions.html")
+    return cached_page("instructions.html")
+
+
 
 
 
+def quiz_class(quizID):
+    # classDB owning a quiz, looked up in the catalog; None when unsharded or unknown
+    if not DB_SHARDS:
+        return None
+    with db_connect() as conn:
+        row = conn.execute('SELECT classDB from quiz_catalog WHERE id = ?', (quizID,)).fetchone()
+    return row[0] if row else None
 
 
-def get_quiz_data(conn, quizID):
+def get_quiz_data(quizID):
     app.logger.info("Getting quiz data from database")
+    classDB = quiz_class(quizID)
+    if DB_SHARDS and classDB is None:
+        app.logger.info("Quiz not in catalog")
+        return None
     sql = 'SELECT * from quiz WHERE id = ?'
-    cur = conn.cursor()
-    cur.execute(sql, (quizID,))
-    data = cur.fetchone()
+    with db_connect(classDB) as conn:
+        cur = conn.cursor()
+        cur.execute(sql, (quizID,))
+        data = cur.fetchone()
     app.logger.info(f"got data : {data}")
     if data:
         column_names = [description[0] for description in cur.description]
         quiz_dict = dict(zip(column_names, data))
-        quiz_dict['quizJSON'] = shuffler(quiz_dict["quizJSON"])
+        quiz_dict['quizJSON'] = json.loads(quiz_dict["quizJSON"])
         app.logger.info("Extracted quiz data successfully")
         return quiz_dict
     else:
@@ -151,89 +769,430 @@ def get_quiz_data(conn, quizID):
         return None
 
 
+def get_cached_quiz(quizID):
+    # quizzes never change after creation, so workers keep parsed copies for a short while
+    entry = _quiz_cache.get(quizID)
+    if entry and time.time() - entry[0] < QUIZ_CACHE_TTL:
+        return entry[1]
+    try:
+        quiz_data = get_quiz_data(quizID)
+    except sqlite3.OperationalError as e:
+        app.logger.error(f"Failed to open database: {e}")
+        return None
+    _quiz_cache.pop(quizID, None)
+    if quiz_data is None:
+        return None
+    now = time.time()
+    # entries are kept in insertion order, so expired ones and the oldest sit at the front
+    while _quiz_cache:
+        oldest = next(iter(_quiz_cache))
+        if now - _quiz_cache[oldest][0] < QUIZ_CACHE_TTL and len(_quiz_cache) < QUIZ_CACHE_MAX:
+            break
+        _quiz_cache.pop(oldest, None)
+    _quiz_cache[quizID] = (now, quiz_data)
+    return quiz_data
+
+
+def evict_cached_quiz(quizID):
+    _quiz_cache.pop(quizID, None)
+
+
+def remove_quiz(quizID, classDB=None):
+    classDB = classDB or quiz_class(quizID)
+    if DB_SHARDS and classDB is None:
+        return
+    with db_connect(classDB) as conn:
+        conn.execute('DELETE from quiz WHERE id = ?', (quizID,))
+    if DB_SHARDS:
+        with db_connect() as conn:
+            conn.execute('DELETE from quiz_catalog WHERE id = ?', (quizID,))
+    evict_cached_quiz(quizID)
+
+
+def start_attempt(quiz_data):
+    # order and answers are stored server-side, so replaying an older cookie cannot undo an answer
+    total = len(quiz_data['quizJSON'])
+    token = os.urandom(16).hex()
+    sql = ''' INSERT INTO attempts(token, quizID, classDB, question_order, created_on)
+              VALUES(?,?,?,?,?) '''
+    with db_connect(quiz_data['classDB']) as conn:
+        conn.execute(sql, (token, quiz_data['id'], quiz_data['classDB'], json.dumps(random.sample(range(total), total)),
+                           datetime.now(timezone.utc).strftime(SQLITE_DATETIME_FORMAT)))
+    session['quiz_data'] = {
+        'id': quiz_data['id'],
+        'subject': quiz_data['subject'],
+        'classDB': quiz_data['classDB'],
+        'total': total,
+    }
+    session['quiz_attempt'] = token
+
+
+def find_attempt():
+    # the attempts row alone is enough to score a submission, even after the teacher ended the quiz
+    data = session.get('quiz_data')
+    token = session.get('quiz_attempt')
+    if not data or not isinstance(token, str):
+        return None
+    sql = 'SELECT quizID, classDB, question_order from attempts WHERE token = ? AND classDB = ?'
+    with db_connect(data['classDB']) as conn:
+        row = conn.execute(sql, (token, data['classDB'])).fetchone()
+    if row is None:
+        return None
+    return {'token': token, 'quizID': row[0], 'classDB': row[1], 'order': json.loads(row[2])}
 
 
+def get_attempt():
+    attempt = find_attempt()
+    if attempt is None:
+        return None, None
+    quiz_data = get_cached_quiz(attempt['quizID'])
+    if quiz_data is None:
+        return None, None
+    return attempt, quiz_data['quizJSON']
+
+
+def attempt_score(conn, token):
+    # (score, answered) for an attempt
+    sql = 'SELECT COALESCE(SUM(correct), 0), COUNT(*) from attempt_answers WHERE token = ?'
+    return conn.execute(sql, (token,)).fetchone()
+
+
+def answer_result(index, question, choice):
+    options = question['options']
+    correct_option = next((i for i, opt in enumerate(options) if opt.get('correct')), None)
+    return {
+        'index': index,
+        'choice': choice,
+        'correct': choice >= 0 and choice == correct_option,
+        'correct_option': correct_option,
+        'rationale': options[choice].get('rationale') if choice >= 0 else None,
+    }
+
 
 @app.route('/student/', methods =["GET", "POST"])
 def student():
     if request.method == "POST":
         id = request.form.get("quizID")
         app.logger.info(f"POST request: got quiz id: {id}")
-        try:
-            with sqlite3.connect("database.db") as conn:
-                app.logger.info("Getting quiz data")
-                quiz_data = get_quiz_data(conn, id)
-
-                if quiz_data==None:
-                    app.logger.info("No quiz data found, returing back")
-                    flash(f'Quiz ID "{id}" not found. Please check the ID and try again.', 'error')
-                    return redirect(url_for('student'))
-                else:
-                    app.logger.info("Quiz data found, going to quiz")
-                    session['quiz_data'] = quiz_data
+        app.logger.info("Getting quiz data")
+        quiz_data = get_cached_quiz(id)
 
-                    return redirect(url_for("quiz"))
-        except sqlite3.OperationalError as e:
-                app.logger.error("Failed to open database:", e)
-    return render_template("student_dashboard.html")
+        if quiz_data==None:
+            app.logger.info("No quiz data found, returing back")
+            flash(f'Quiz ID "{id}" not found. Please check the ID and try again.', 'error')
+            return redirect(url_for('student'))
+        else:
+            app.logger.info("Quiz data found, going to quiz")
+            try:
+                start_attempt(quiz_data)
+            except sqlite3.OperationalError as e:
+                app.logger.error(f"Failed to start attempt: {e}")
+                flash('Could not start the quiz. Please try again.', 'error')
+                return redirect(url_for('student'))
+
+            return redirect(url_for("quiz"))
+    return cached_page("student_dashboard.html")
+
+
+@app.route('/api/quiz/questions/')
+def quiz_questions():
+    attempt, questions = get_attempt()
+    if attempt is None:
+        return jsonify({'success': False, 'message': 'No active quiz.'}), 404
+
+    page = request.args.get('page', 0, type=int)
+    size = min(max(request.args.get('size', QUIZ_PAGE_SIZE, type=int), 1), QUIZ_MAX_PAGE_SIZE)
+    if page < 0:
+        return jsonify({'success': False, 'message': 'Invalid page.'}), 400
+
+    order = attempt['order']
+    start = page * size
+    page_questions = []
+    for index in range(start, min(start + size, len(order))):
+        question = questions[order[index]]
+        page_questions.append({
+            'index': index,
+            'question': question['question'],
+            'options': [opt['text'] for opt in question['options']],
+        })
+    return jsonify({
+        'success': True,
+        'page': page,
+        'size': size,
+        'total': len(order),
+        'has_more': start + size < len(order),
+        'questions': page_questions,
+    })
+
+
+@app.route('/api/quiz/answers/', methods=['POST'])
+def quiz_answers():
+    attempt, questions = get_attempt()
+    if attempt is None:
+        return jsonify({'success': False, 'message': 'No active quiz.'}), 404
+
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get('answers'), list):
+        return jsonify({'success': False, 'message': 'Invalid answers.'}), 400
+    order = attempt['order']
+    answers = []
+    for item in payload['answers']:
+        if not isinstance(item, dict):
+            return jsonify({'success': False, 'message': 'Invalid answers.'}), 400
+        index = item.get('index')
+        if not isinstance(index, int) or not 0 <= index < len(order):
+            return jsonify({'success': False, 'message': f'Invalid question index: {index}'}), 400
+        question = questions[order[index]]
+        choice = item.get('choice')
+        if not isinstance(choice, int) or not 0 <= choice < len(question['options']):
+            choice = -1
+        answers.append((index, question, choice))
+
+    results = []
+    insert_sql = ''' INSERT OR IGNORE INTO attempt_answers(token, position, choice, correct)
+                     VALUES(?,?,?,?) '''
+    with db_connect(attempt['classDB']) as conn:
+        for index, question, choice in answers:
+            # first answer is final, repeats (or replays) just get the recorded result back
+            correct = choice >= 0 and bool(question['options'][choice].get('correct'))
+            conn.execute(insert_sql, (attempt['token'], index, choice, int(correct)))
+            stored = conn.execute('SELECT choice from attempt_answers WHERE token = ? AND position = ?',
+                                  (attempt['token'], index)).fetchone()[0]
+            results.append(answer_result(index, question, stored))
+        score, answered = attempt_score(conn, attempt['token'])
+
+    app.logger.info(f"Checked {len(results)} answers, score now {score}")
+    return jsonify({
+        'success': True,
+        'results': results,
+        'score': score,
+        'answered': answered,
+    })
+
+
+def attempt_answers(attempt):
+    # {position: choice} recorded so far
+    with db_connect(attempt['classDB']) as conn:
+        rows = conn.execute('SELECT position, choice from attempt_answers WHERE token = ?', (attempt['token'],)).fetchall()
+    return dict(rows)
+
+
+def pdf_text(text):
+    # quiz text may carry html, Paragraph needs it stripped and escaped
+    return escape(re.sub(r'</?[a-zA-Z][^<>]*>', '', str(text)))
+
+
+@app.route('/api/quiz/report/', methods=['POST'])
+def quiz_report():
+    # the student's own result sheet, built from the recorded answers rather than client state
+    attempt, questions = get_attempt()
+    if attempt is None:
+        return jsonify({'success': False, 'message': 'No active quiz.'}), 404
+    payload = request.get_json(silent=True) or {}
+    student_name = str(payload.get('student_name') or 'Student')[:100]
+    student_id = str(payload.get('student_id') or 'N/A')[:50]
+    duration = payload.get('duration')
+    duration = int(duration) if isinstance(duration, (int, float)) and duration >= 0 else 0
+
+    order = attempt['order']
+    answers = attempt_answers(attempt)
+    results = [answer_result(index, questions[order[index]], answers[index]) if index in answers else None
+               for index in range(len(order))]
+    score = sum(1 for result in results if result and result['correct'])
+    percentage = round(score / len(order) * 100) if order else 0
+    app.logger.info(f"Building result sheet for {student_id}, score {score}/{len(order)}")
 
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=letter,
+        title=f"ADAM Assessment Report {student_name}",
+        leftMargin=40, rightMargin=40, topMargin=40, bottomMargin=40
+    )
+    styles = getSampleStyleSheet()
 
+    col_primary = colors.HexColor("#2C3E50") # Dark Blue
+    col_success = colors.HexColor("#27AE60") # Green
+    col_error   = colors.HexColor("#C0392B") # Red
+    col_light   = colors.HexColor("#ECF0F1") # Light Gray
+    col_badge = col_success if percentage >= 50 else col_error
+
+    style_banner = ParagraphStyle('Banner', parent=styles['Normal'], textColor=colors.white, fontSize=20,
+                                  fontName='Helvetica-Bold', leading=24)
+    style_banner_small = ParagraphStyle('BannerSmall', parent=styles['Normal'], textColor=colors.white, fontSize=9)
+    style_banner_right = ParagraphStyle('BannerRight', parent=style_banner_small, alignment=TA_RIGHT)
+    style_heading = ParagraphStyle('Heading', parent=styles['Normal'], textColor=col_primary, fontSize=12,
+                                   fontName='Helvetica-Bold', spaceAfter=4)
+    style_score = ParagraphStyle('Score', parent=styles['Normal'], textColor=col_badge, alignment=TA_CENTER,
+                                 fontSize=18, fontName='Helvetica-Bold', leading=22)
+    style_score_note = ParagraphStyle('ScoreNote', parent=styles['Normal'], textColor=colors.grey,
+                                      alignment=TA_CENTER, fontSize=9)
+    style_question = ParagraphStyle('Question', parent=styles['Normal'], fontSize=10, fontName='Helvetica-Bold', leading=13)
+    style_answer = ParagraphStyle('Answer', parent=styles['Normal'], fontSize=9, textColor=colors.HexColor("#505050"))
+
+    now = datetime.now(timezone.utc)
+    story = []
 
-def submit_quiz(conn, data, className):
+    # Header banner
+    banner = Table([[
+        [Paragraph("ASSESSMENT REPORT", style_banner), Paragraph("ADAM: A Dynamic Assessment Module", style_banner_small)],
+        [Paragraph(f"Date: {now.strftime('%Y-%m-%d')}", style_banner_right),
+         Paragraph(f"Time: {now.strftime('%H:%M')} UTC", style_banner_right)],
+    ]], colWidths=[372, 160])
+    banner.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, -1), col_primary),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('TOPPADDING', (0, 0), (-1, -1), 14),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 14),
+        ('LEFTPADDING', (0, 0), (-1, -1), 14),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 14),
+    ]))
+    story.append(banner)
+    story.append(Spacer(1, 20))
+
+    # Student details and score box
+    minutes, seconds = divmod(duration, 60)
+    details = [
+        Paragraph("STUDENT DETAILS", style_heading),
+        Paragraph(f"Name: {escape(student_name)}", styles['Normal']),
+        Paragraph(f"ID: {escape(student_id)}", styles['Normal']),
+        Paragraph(f"Duration: {minutes} min {seconds} sec", styles['Normal']),
+    ]
+    score_box = [
+        Paragraph(f"{percentage}%", style_score),
+        Paragraph(f"{score} / {len(order)} Correct", style_score_note),
+    ]
+    summary = Table([[details, score_box]], colWidths=[402, 130])
+    summary.setStyle(TableStyle([
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('BOX', (1, 0), (1, 0), 1, col_badge),
+        ('TOPPADDING', (1, 0), (1, 0), 10),
+        ('BOTTOMPADDING', (1, 0), (1, 0), 10),
+    ]))
+    story.append(summary)
+    story.append(Spacer(1, 20))
+
+    # Detailed breakdown
+    story.append(Paragraph("DETAILED BREAKDOWN", style_heading))
+    story.append(HRFlowable(width="100%", color=colors.lightgrey, spaceAfter=10))
+    for index, result in enumerate(results):
+        question = questions[order[index]]
+        if result is None:
+            status, status_color, chosen = "NO RESPONSE", colors.grey, "N/A"
+        elif result['choice'] < 0:
+            status, status_color, chosen = "TIMEOUT", col_error, "No answer submitted"
+        else:
+            status = "CORRECT" if result['correct'] else "INCORRECT"
+            status_color = col_success if result['correct'] else col_error
+            chosen = question['options'][result['choice']]['text']
+        card = Table([
+            [Paragraph(f"Q{index + 1}: {pdf_text(question['question'])}", style_question)],
+            [Paragraph(f'<font color="#{status_color.hexval()[2:]}"><b>{status}</b></font>'
+                       f'&nbsp;&nbsp;&nbsp;You chose: {pdf_text(chosen)}', style_answer)],
+        ], colWidths=[532])
+        card.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), col_light),
+            ('LEFTPADDING', (0, 0), (-1, -1), 10),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+        ]))
+        story.append(card)
+        story.append(Spacer(1, 6))
+
+    with memory_snapshot('doc.build'):
+        doc.build(story)
+    buffer.seek(0)
+
+    return send_file(
+        buffer,
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=secure_filename(f"Report_{student_name}.pdf") or "Report.pdf"
+    )
 
-    sql = f''' INSERT INTO {className}(st_id, st_name, t_marks, o_marks)
-            VALUES(?,?,?,?) '''
-    cur = conn.cursor()
-    cur.execute(sql, data)
-    conn.commit()
-    return cur.lastrowid
+
+def attempt_marks(attempt):
+    # answers were checked server-side, posted marks are never trusted
+    with db_connect(attempt['classDB']) as conn:
+        score, _ = attempt_score(conn, attempt['token'])
+    return len(attempt['order']), score
+
+
+def submit_quiz(data, className, completed=True):
+    # one row per student; a completed attempt replaces an abandoned one, never the other way round
+    sql = f''' INSERT INTO {className}(st_id, st_name, t_marks, o_marks, completed)
+            VALUES(?,?,?,?,?)
+            ON CONFLICT(st_id) DO UPDATE SET
+                st_name = excluded.st_name, t_marks = excluded.t_marks,
+                o_marks = excluded.o_marks, completed = excluded.completed
+            WHERE excluded.completed > {className}.completed '''
+    with db_connect(className) as conn:
+        cur = conn.cursor()
+        cur.execute(sql, (*data, int(completed)))
+        conn.commit()
+    return cur.rowcount
+
+
+def already_submitted(token, completed):
+    # only validated attempts are ever remembered, so a hit can be answered without reading the database
+    return isinstance(token, str) and _recent_submissions.get(token, 0) >= (2 if completed else 1)
+
+
+def is_duplicate_submission(token, completed):
+    # cheap pre-check before the upsert; a race between two threads just falls through to the database
+    if already_submitted(token, completed):
+        return True
+    _recent_submissions.pop(token, None)
+    _recent_submissions[token] = 2 if completed else 1
+    while len(_recent_submissions) > RECENT_SUBMISSIONS_MAX:
+        # another thread may have evicted the same key first
+        _recent_submissions.pop(next(iter(_recent_submissions), None), None)
+    return False
 
 @app.route('/quiz/', methods =["GET", "POST"])
 def quiz():
     if request.method == 'POST':
-        submission_type = request.form.get('submission_type')
-        if submission_type == 'abandoned':
-            stID = request.form.get("student_id")
-            stName = request.form.get("student_name")
-            tMarks = request.form.get("total_marks")
-            oMarks = request.form.get("obtained_marks")
-            classDB = request.form.get("classdb")
-            app.logger.info(f"POST request: data received for incomplete submission: {stID},{stName},{tMarks},{oMarks},{classDB}")
-            try:
-                with sqlite3.connect("database.db") as conn:
-                    app.logger.info("Submitting quiz data")
-                    data = (stID, stName, tMarks, oMarks)
-                    submitted_st = submit_quiz(conn, data, classDB)
-                    app.logger.info(f"Submitted successfully {submitted_st}")
-            except sqlite3.OperationalError as e:
-                app.logger.error("Failed to Submit Quiz:", e)
+        completed = request.form.get('submission_type') != 'abandoned'
+        stID = request.form.get("student_id")
+        stName = request.form.get("student_name")
+        if already_submitted(session.get('quiz_attempt'), completed):
+            app.logger.info(f"Duplicate submission ignored for {stID}")
             return redirect(url_for("student"))
-        else:
-            stID = request.form.get("student_id")
-            stName = request.form.get("student_name")
-            tMarks = request.form.get("total_marks")
-            oMarks = request.form.get("obtained_marks")
-            classDB = request.form.get("classdb")
-            app.logger.info(f"POST request: data received: {stID},{stName},{tMarks},{oMarks},{classDB}")
-            try:
-                with sqlite3.connect("database.db") as conn:
-                    app.logger.info("Submitting quiz data")
-                    data = (stID, stName, tMarks, oMarks)
-                    submitted_st = submit_quiz(conn, data, classDB)
-                    app.logger.info(f"Submitted successfully {submitted_st}")
-            except sqlite3.OperationalError as e:
-                app.logger.error("Failed to Submit Quiz:", e)
+        attempt = find_attempt()
+        if attempt is None:
+            app.logger.warning(f"Submission for {stID} rejected, no active attempt")
+            flash('No active quiz to submit. Please enter the Quiz ID again.', 'error')
+            return redirect(url_for("student"))
+        # the class comes from the attempt, so results can only land in the quiz's own table
+        classDB = attempt['classDB']
+        token = attempt['token']
+        if is_duplicate_submission(token, completed):
+            app.logger.info(f"Duplicate submission ignored for {stID} in {classDB}")
             return redirect(url_for("student"))
+        tMarks, oMarks = attempt_marks(attempt)
+        if completed:
+            app.logger.info(f"POST request: data received: {stID},{stName},{tMarks},{oMarks},{classDB}")
+        else:
+            app.logger.info(f"POST request: data received for incomplete submission: {stID},{stName},{tMarks},{oMarks},{classDB}")
+        try:
+            app.logger.info("Submitting quiz data")
+            data = (stID, stName, tMarks, oMarks)
+            submitted_st = submit_quiz(data, classDB, completed)
+            app.logger.info(f"Submitted successfully {submitted_st}")
+        except sqlite3.Error as e:
+            # forget the token so a retry can still get through
+            _recent_submissions.pop(token, None)
+            app.logger.error(f"Failed to Submit Quiz: {e}")
+        return redirect(url_for("student"))
 
 
     data = session.get("quiz_data")
 
-    return render_template("quiz.html", data = data)
+    return render_template("quiz.html", data = data, page_size = QUIZ_PAGE_SIZE)
 
 
 @app.route('/teacher/')
 def teacher():
-    return render_template('teacher.html')
+    return cached_page('teacher.html')
 
 
 @app.route("/create-quiz/", methods=["GET", "POST"])
@@ -286,67 +1245,89 @@ def create_quiz():
             classDB = generate_unique_id('CLS')
             creation_date = datetime.now(timezone.utc).strftime(SQLITE_DATETIME_FORMAT)
             try:
-                with sqlite3.connect("database.db") as conn:
-                    user = (teacher_id, teacher_fname, teacher_email, subject_name, classDB, creation_date, quiz_id, False)
-                    user_id = add_user(conn, user)
-                    app.logger.info(f"Created user with id: {user_id}")
-                    quiz_data = (quiz_id, fetched_quiz['quiz_JSON'], subject_name, teacher_fname, classDB)
-                    created_quiz = add_quiz(conn, quiz_data)
-                    app.logger.info(f"created quiz with id: {create_quiz}")
-                    if create_temp_table(conn, classDB):
-                        # 5. Return JSON Response to the JavaScript's fetch() call
-                        return jsonify({
-                            'success': True,
-                            'teacher_id': teacher_id,
-                            'quiz_id': quiz_id,
-                            'message': 'Quiz successfully generated.'
-                        })
-                    else:
-                        app.logger.error("Failed to create table:", e)
-                        return jsonify({'success': False, 'message': 'Server failed to generate quiz.'}), 500 
+                user = (teacher_id, teacher_fname, teacher_email, subject_name, classDB, creation_date, quiz_id, False, None)
+                user_id = add_user(user)
+                app.logger.info(f"Created user with id: {user_id}")
+                quiz_data = (quiz_id, fetched_quiz['quiz_JSON'], subject_name, teacher_fname, classDB)
+                created_quiz = add_quiz(quiz_data)
+                app.logger.info(f"created quiz with id: {create_quiz}")
+                if create_temp_table(classDB):
+                    # 5. Return JSON Response to the JavaScript's fetch() call
+                    return jsonify({
+                        'success': True,
+                        'teacher_id': teacher_id,
+                        'quiz_id': quiz_id,
+                        'message': 'Quiz successfully generated.'
+                    })
+                else:
+                    app.logger.error("Failed to create table:", e)
+                    return jsonify({'success': False, 'message': 'Server failed to generate quiz.'}), 500 
             except sqlite3.OperationalError as e:
                 app.logger.error("Failed to open database:", e)
                 return jsonify({'success': False, 'message': 'Server failed to generate quiz.'}), 500            
-    return render_template('create_quiz.html')
+    return cached_page('create_quiz.html')
 
-def create_temp_table(conn, table_name):
-    cur = conn.cursor()
-    sql = f"""CREATE TABLE {table_name}(
+CLASS_SCHEMA = """CREATE TABLE {table_name}(
         st_id text PRIMARY KEY,
         st_name text NOT NULL,
         t_marks integer NOT NULL,
-        o_marks integer NOT NULL
+        o_marks integer NOT NULL,
+        completed integer NOT NULL DEFAULT 1
         
         );"""
-    cur.execute(sql)
+
+# shared by the single-session helpers below and add_sessions_bulk
+ADD_USER_SQL = ''' INSERT INTO users(id, name, email, subject, classDB, created_on, quizID, quiz_ended, expires_on)
+              VALUES(?,?,?,?,?,?,?,?,?) '''
+
+ADD_QUIZ_SQL = '''INSERT INTO quiz(id, quizJSON, subject, host, classDB)
+             VALUES(?,?,?,?,?) '''
+
+ADD_CATALOG_SQL = 'INSERT INTO quiz_catalog(id, classDB) VALUES(?,?)'
+
+def create_temp_table(table_name):
+    sql = CLASS_SCHEMA.format(table_name=table_name)
+    with db_connect(table_name) as conn:
+        cur = conn.cursor()
+        cur.execute(sql)
     return True
 
-def add_user(conn, usr):
-    sql = ''' INSERT INTO users(id, name, email, subject, classDB, created_on, quizID, quiz_ended)
-              VALUES(?,?,?,?,?,?,?,?) '''
-    cur = conn.cursor()
-    cur.execute(sql, usr)
-    conn.commit()
+def add_user(usr):
+    with db_connect() as conn:
+        cur = conn.cursor()
+        cur.execute(ADD_USER_SQL, usr)
+        conn.commit()
     return cur.lastrowid
 
-def add_quiz(conn, quiz):
-    sql = '''INSERT INTO quiz(id, quizJSON, subject, host, classDB)
-             VALUES(?,?,?,?,?) '''
-    
-    cur = conn.cursor()
-    cur.execute(sql, quiz)
-    conn.commit()
+def add_quiz(quiz):
+    # quiz rows live next to their class results (quiz[4] is the classDB)
+    with db_connect(quiz[4]) as conn:
+        cur = conn.cursor()
+        cur.execute(ADD_QUIZ_SQL, quiz)
+        conn.commit()
+    if DB_SHARDS:
+        with db_connect() as conn:
+            conn.execute(ADD_CATALOG_SQL, (quiz[0], quiz[4]))
     return cur.lastrowid
 
+def add_sessions_bulk(sessions):
+    # (user, quiz) pairs shaped like add_user/add_quiz arguments, one transaction per database file
+    by_shard = {}
+    for _, quiz in sessions:
+        by_shard.setdefault(shard_for(quiz[4]) if DB_SHARDS else None, []).append(quiz)
+    # quizzes and class tables first, so a teacher row never points at a missing quiz
+    for quizzes in by_shard.values():
+        with db_connect(quizzes[0][4]) as conn:
+            conn.executemany(ADD_QUIZ_SQL, quizzes)
+            for quiz in quizzes:
+                conn.execute(CLASS_SCHEMA.format(table_name=quiz[4]))
+    with db_connect() as conn:
+        conn.executemany(ADD_USER_SQL, [user for user, _ in sessions])
+        if DB_SHARDS:
+            conn.executemany(ADD_CATALOG_SQL, [(quiz[0], quiz[4]) for _, quiz in sessions])
+    return len(sessions)
 
 
-def shuffler(json_txt):
-    app.logger.info("Shuffling Quiz")
-    import json
-    import random
-    txt_list = json.loads(json_txt)
-    random.shuffle(txt_list)
-    return txt_list
 
 def shuffler_verify(json_txt):
     import json
@@ -362,7 +1343,7 @@ def shuffler_verify(json_txt):
         app.logger.error("Error in shuffle and verify")
         return False
 
-def text_extractor(file_path):
+def text_extractor(file_path, remove=True):
     from langchain_community.document_loaders import PyMuPDFLoader
     app.logger.info("Loading document for text extraction")
     loader = PyMuPDFLoader(file_path)
@@ -372,9 +1353,10 @@ def text_extractor(file_path):
     for doc in docs:
         txt += doc.page_content
     app.logger.info("Doc text retreived")
-    app.logger.info("Deleting uploaded doc")
-    os.remove(file_path)
-    app.logger.info("Doc removed successfullt")
+    if remove:
+        app.logger.info("Deleting uploaded doc")
+        os.remove(file_path)
+        app.logger.info("Doc removed successfullt")
     return txt
 
 def quiz_generator(quiz_topics = None, quiz_doc = None):
@@ -382,7 +1364,8 @@ def quiz_generator(quiz_topics = None, quiz_doc = None):
     userTxt = quiz_topics
     if quiz_doc:
         app.logger.info("Found document")
-        userTxt = text_extractor(quiz_doc)
+        with memory_snapshot('text_extractor'):
+            userTxt = text_extractor(quiz_doc)
     client = OpenAI(
     base_url="https://openrouter.ai/api/v1",
     api_key=os.getenv('OPENROUTER_API_KEY'),
@@ -459,30 +1442,30 @@ def teacher_login():
         id = request.form.get("teacherID")
         app.logger.info(f"POST request: got teacher id: {id}")
         try:
-            with sqlite3.connect("database.db") as conn:
-                app.logger.info("Getting teacher data")
-                teacher_data = get_teacher_data(conn, id)
-
-                if teacher_data==None:
-                    app.logger.warning("No teacher data retreived")
-                    flash(f'Teacher ID "{id}" not found. Please check the ID and try again.', 'error')
-                    return redirect(url_for('teacher_login'))
-                else:
-                    app.logger.info("Data retreived, redirecting to dashboard")
-                    
+            app.logger.info("Getting teacher data")
+            teacher_data = get_teacher_data(id)
+
+            if teacher_data==None:
+                app.logger.warning("No teacher data retreived")
+                flash(f'Teacher ID "{id}" not found. Please check the ID and try again.', 'error')
+                return redirect(url_for('teacher_login'))
+            else:
+                app.logger.info("Data retreived, redirecting to dashboard")
+                
 
-                    return redirect(url_for("teacher_dashboard"))
-                    
+                return redirect(url_for("teacher_dashboard"))
+                
         except sqlite3.OperationalError as e:
                 app.logger.error("Failed to open database:", e)
-    return render_template('teacher_login.html')
+    return cached_page('teacher_login.html')
 
 
-def get_teacher_data(conn, teacher_id):
+def get_teacher_data(teacher_id):
     sql = 'SELECT * from users WHERE id = ?'
-    cur = conn.cursor()
-    cur.execute(sql, (teacher_id,))
-    data = cur.fetchone()
+    with db_connect() as conn:
+        cur = conn.cursor()
+        cur.execute(sql, (teacher_id,))
+        data = cur.fetchone()
     app.logger.info(f"Got teacher data from database: {data}")
     if data:
         column_names = [description[0] for description in cur.description]
@@ -496,12 +1479,13 @@ def get_teacher_data(conn, teacher_id):
 
 
 
-def get_class_data(conn, classDB):
+def get_class_data(classDB):
     app.logger.info("Getting class data from database")
-    sql = f'SELECT * from {classDB}'
-    cur = conn.cursor()
-    cur.execute(sql)
-    data = cur.fetchall()
+    sql = f'SELECT st_id, st_name, t_marks, o_marks from {classDB}'
+    with db_connect(classDB) as conn:
+        cur = conn.cursor()
+        cur.execute(sql)
+        data = cur.fetchall()
     app.logger.info("Retreived class data ")
     app.logger.info(f"Class data {data}, Lenght: {len(data)}, Type: {type(data)}")
     if len(data)>0:
@@ -512,16 +1496,14 @@ def get_class_data(conn, classDB):
         return None
 
 
-def delete_quiz(conn, quizid, teacherID):
-    sql = 'DELETE from quiz WHERE id = ?'
+def delete_quiz(quizid, teacherID):
     sql2 = "UPDATE users SET quiz_ended=? WHERE id = ?"
-    cur = conn.cursor()
     try:
-        cur.execute(sql, (quizid,))
-        conn.commit()
+        remove_quiz(quizid)
         app.logger.info("Quiz deleted successfully")
-        cur.execute(sql2, (True, teacherID))
-        conn.commit()
+        with db_connect() as conn:
+            conn.execute(sql2, (True, teacherID))
+            conn.commit()
         return True
     except sqlite3.OperationalError as e:
         app.logger.error(e)
@@ -533,19 +1515,17 @@ def teacher_dashboard():
     data = session.get("teacher_data")
     if request.method == "POST":
         try:
-            with sqlite3.connect("database.db") as conn:
-                app.logger.info("Deleting Quiz ")
-                delete_quiz(conn, data['quizID'], data['id'])
-                get_teacher_data(conn, data['id'])
-                return redirect(url_for("teacher_dashboard")) 
+            app.logger.info("Deleting Quiz ")
+            delete_quiz(data['quizID'], data['id'])
+            get_teacher_data(data['id'])
+            return redirect(url_for("teacher_dashboard")) 
         except sqlite3.OperationalError as e:
             app.logger.error("Failed to open database:", e)    
     try:
-        with sqlite3.connect("database.db") as conn:
-            app.logger.info("Detting data")
-            class_data = get_class_data(conn, data['classDB']) 
-            data['classData'] = class_data           
-            app.logger.info(f"Sending class data: {data}")
+        app.logger.info("Detting data")
+        class_data = get_class_data(data['classDB']) 
+        data['classData'] = class_data           
+        app.logger.info(f"Sending class data: {data}")
     except sqlite3.OperationalError as e:
         app.logger.error("Failed to open database:", e)
     
@@ -557,32 +1537,37 @@ def teacher_dashboard():
 
 def get_quiz_details_and_results(teacher_id):
     try:
-        with sqlite3.connect("database.db") as conn:
+        with db_connect() as conn:
             sql = 'SELECT * from users WHERE id = ?'
             cur = conn.cursor()
             cur.execute(sql, (teacher_id,))
             data = cur.fetchone()
-            app.logger.info(f"Retreived data : {data}")
-            if data:
-                column_names = [description[0] for description in cur.description]
-                user_dict = dict(zip(column_names, data))
-                data = {
-                'quizID': user_dict['quizID'],
-                'subject': user_dict['subject'],
-                'created_on': user_dict['created_on'],
-                'classDB': user_dict['classDB'],
-                'name': "Prof. "+user_dict['name'],
-                'total_questions': 10,
-                # The crucial list structure: (stID, stName, total_marks, obtained_marks)
-                'classData': get_class_data(conn, user_dict['classDB'])
-                }
-            else:
-                user_dict =  None
-                data = None
-
-            return data
+        app.logger.info(f"Retreived data : {data}")
+        if data:
+            column_names = [description[0] for description in cur.description]
+            user_dict = dict(zip(column_names, data))
+            class_data = get_class_data(user_dict['classDB'])
+        else:
+            # expired sessions are no longer in the hot database, try the archive
+            archived = get_archived_session(teacher_id)
+            if archived is None:
+                return None
+            user_dict = archived['teacher']
+            class_data = archived['results']
+
+        data = {
+        'quizID': user_dict['quizID'],
+        'subject': user_dict['subject'],
+        'created_on': user_dict['created_on'],
+        'classDB': user_dict['classDB'],
+        'name': "Prof. "+user_dict['name'],
+        'total_questions': 10,
+        # The crucial list structure: (stID, stName, total_marks, obtained_marks)
+        'classData': class_data
+        }
+        return data
             
-    except sqlite3.Error as e:
+    except (sqlite3.Error, OSError) as e:
         app.logger.error(f"Database error in report generator: {e}")
         return None
 
@@ -811,7 +1796,8 @@ def download_report(teacher_id):
     ))
 
     # 6. Build
-    doc.build(story)
+    with memory_snapshot('doc.build'):
+        doc.build(story)
     buffer.seek(0)
     
     return send_file(
@@ -0,0 +1,271 @@
+"""Create quizzes in bulk from a directory or CSV manifest of PDFs and topics.
+
+    uv run batch_create.py materials/ --teacher-email hod@school.edu
+    uv run batch_create.py manifest.csv --concurrency 8
+
+Manifest columns: pdf, topics, subject, teacher_name, teacher_email. Every row
+needs a pdf or topics; relative pdf paths are resolved against the manifest and
+empty columns fall back to the command-line defaults. In directory mode every
+PDF becomes one quiz whose subject is the file name.
+
+Text is extracted in a process pool while quiz generation runs on a bounded
+thread pool, and finished quizzes are written in bulk transactions. Each
+written quiz is appended to the checkpoint file together with its teacher and
+quiz IDs, so re-running the same command skips it and only retries failures.
+Source PDFs are never deleted.
+
+Like sessions made in the browser, every quiz expires ADAM.SESSION_MINUTES
+after it is written and is then archived and removed from the database.
+--valid-for stores a different expiry time with each quiz.
+"""
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+
+from flask.logging import default_handler
+
+import ADAM
+
+
+def load_jobs(source, args):
+    rows = []
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if ADAM.allowed_file(name):
+                rows.append({'pdf': os.path.join(source, name)})
+    else:
+        base = os.path.dirname(os.path.abspath(source))
+        with open(source, newline='') as f:
+            for row in csv.DictReader(f):
+                row = {k: (v or '').strip() for k, v in row.items() if k}
+                if row.get('pdf'):
+                    row['pdf'] = os.path.join(base, row['pdf'])
+                rows.append(row)
+
+    jobs = []
+    for row in rows:
+        pdf = os.path.abspath(row['pdf']) if row.get('pdf') else None
+        job = {
+            'pdf': pdf,
+            'topics': row.get('topics') or args.topics,
+            'subject': row.get('subject') or args.subject or (os.path.splitext(os.path.basename(pdf))[0] if pdf else None),
+            'teacher_name': row.get('teacher_name') or args.teacher_name,
+            'teacher_email': row.get('teacher_email') or args.teacher_email,
+        }
+        job['key'] = pdf or f"topics:{job['subject']}:{job['topics']}"
+        jobs.append(job)
+    return jobs
+
+
+def check_job(job):
+    # same requirements as the /create-quiz/ form
+    if not job['teacher_email'] or not job['subject']:
+        return 'Missing teacher email or subject.'
+    if not job['pdf'] and not job['topics']:
+        return 'Quiz must have either a document or topics.'
+    if job['pdf'] and not os.path.isfile(job['pdf']):
+        return f"File not found: {job['pdf']}"
+    return None
+
+
+def load_checkpoint(path):
+    done = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    done[record['key']] = record
+    return done
+
+
+def append_checkpoint(path, records):
+    with open(path, 'a') as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def extract(path):
+    # runs in a worker process
+    started = time.perf_counter()
+    text = ADAM.text_extractor(path, remove=False)
+    return text, time.perf_counter() - started
+
+
+def generate(text):
+    started = time.perf_counter()
+    # the document text goes in the same prompt slot quiz_generator() uses for uploads
+    result = ADAM.quiz_generator(quiz_topics=text)
+    if result['redflag']:
+        raise RuntimeError(str(result['quiz_JSON'])[:200])
+    return result['quiz_JSON'], time.perf_counter() - started
+
+
+def write_batch(batch, checkpoint, valid_for=None):
+    # without valid_for expires_on stays NULL and the session gets the usual SESSION_MINUTES
+    now = datetime.now(timezone.utc)
+    creation_date = now.strftime(ADAM.SQLITE_DATETIME_FORMAT)
+    expiry_date = (now + timedelta(minutes=valid_for or ADAM.SESSION_MINUTES)).strftime(ADAM.SQLITE_DATETIME_FORMAT)
+    expires_on = expiry_date if valid_for else None
+    sessions = []
+    records = []
+    for job, quiz_JSON in batch:
+        teacher_id = ADAM.generate_unique_id("TCH")
+        quiz_id = ADAM.generate_unique_id("QZ")
+        classDB = ADAM.generate_unique_id('CLS')
+        user = (teacher_id, job['teacher_name'], job['teacher_email'], job['subject'], classDB, creation_date, quiz_id, False, expires_on)
+        quiz = (quiz_id, quiz_JSON, job['subject'], job['teacher_name'], classDB)
+        sessions.append((user, quiz))
+        records.append({
+            'key': job['key'],
+            'subject': job['subject'],
+            'teacher_id': teacher_id,
+            'quiz_id': quiz_id,
+            'created_on': creation_date,
+            'expires_on': expiry_date,
+        })
+    ADAM.add_sessions_bulk(sessions)
+    append_checkpoint(checkpoint, records)
+    return records
+
+
+def new_stage():
+    return {'items': 0, 'busy': 0.0, 'first': None, 'last': None, 'bytes': 0}
+
+
+def mark(stage, started, busy, nbytes=0):
+    stage['items'] += 1
+    stage['busy'] += busy
+    stage['bytes'] += nbytes
+    stage['first'] = started if stage['first'] is None else min(stage['first'], started)
+    stage['last'] = time.perf_counter()
+
+
+def run(jobs, args):
+    stats = {'extract': new_stage(), 'generate': new_stage(), 'write': new_stage()}
+    failures = []
+    created = []
+    batch = []
+
+    def flush():
+        if not batch:
+            return
+        started = time.perf_counter()
+        try:
+            records = write_batch(batch, args.checkpoint, args.valid_for)
+        except sqlite3.Error as e:
+            failures.extend(('write', job['key'], str(e)) for job, _ in batch)
+        else:
+            created.extend(records)
+            for _ in records:
+                mark(stats['write'], started, (time.perf_counter() - started) / len(records))
+        batch.clear()
+
+    with ProcessPoolExecutor(args.extract_workers) as extract_pool, ThreadPoolExecutor(args.concurrency) as generate_pool:
+        futures = {}
+        for job in jobs:
+            if job['pdf']:
+                futures[extract_pool.submit(extract, job['pdf'])] = ('extract', job, time.perf_counter())
+            else:
+                futures[generate_pool.submit(generate, job['topics'])] = ('generate', job, time.perf_counter())
+
+        pending = set(futures)
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, job, started = futures.pop(future)
+                try:
+                    value, busy = future.result()
+                except Exception as e:
+                    failures.append((stage, job['key'], str(e) or type(e).__name__))
+                    continue
+                if stage == 'extract':
+                    mark(stats['extract'], started, busy, os.path.getsize(job['pdf']))
+                    follow_up = generate_pool.submit(generate, value)
+                    futures[follow_up] = ('generate', job, time.perf_counter())
+                    pending.add(follow_up)
+                else:
+                    mark(stats['generate'], started, busy)
+                    batch.append((job, value))
+                    if len(batch) >= args.batch_size:
+                        flush()
+        flush()
+    return stats, created, failures
+
+
+def report(stats, created, skipped, failures):
+    print(f"\n{'stage':<10}{'items':>7}{'wall s':>9}{'items/s':>9}{'busy s':>9}")
+    for name, stage in stats.items():
+        wall = (stage['last'] - stage['first']) if stage['items'] else 0.0
+        rate = stage['items'] / wall if wall else 0.0
+        line = f"{name:<10}{stage['items']:>7}{wall:>9.2f}{rate:>9.2f}{stage['busy']:>9.2f}"
+        if stage['bytes'] and wall:
+            line += f"   {stage['bytes'] / wall / 1e6:.2f} MB/s"
+        print(line)
+
+    print(f"\nCreated {len(created)} quizzes, skipped {skipped} already in the checkpoint, {len(failures)} failed.")
+    for record in created:
+        print(f"  {record['subject']:<30} teacher {record['teacher_id']}  quiz {record['quiz_id']}"
+              f"  expires {record['expires_on']} UTC")
+    if created:
+        print("Expired quizzes are archived and their IDs stop working; use --valid-for to keep them open longer.")
+    if failures:
+        print("\nFailures:")
+        for stage, key, error in failures:
+            print(f"  [{stage}] {key}: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('source', help="directory of PDFs or CSV manifest")
+    parser.add_argument('--teacher-name', default='', help="default teacher name")
+    parser.add_argument('--teacher-email', help="default teacher email")
+    parser.add_argument('--subject', help="default subject (directory mode uses the file name)")
+    parser.add_argument('--topics', help="default topics for rows without a pdf")
+    parser.add_argument('--extract-workers', type=int, default=os.cpu_count(), help="text extraction processes")
+    parser.add_argument('--concurrency', type=int, default=4, help="quiz generation requests in flight")
+    parser.add_argument('--batch-size', type=int, default=25, help="quizzes per write transaction")
+    parser.add_argument('--checkpoint', default='batch_checkpoint.jsonl', help="progress file used to resume")
+    parser.add_argument('--valid-for', type=int, metavar='MINUTES',
+                        help=f"minutes each quiz stays open after it is written (default {ADAM.SESSION_MINUTES})")
+    parser.add_argument('--verbose', action='store_true', help="also print the app log to stderr")
+    args = parser.parse_args()
+    if args.valid_for is not None and args.valid_for < 1:
+        parser.error("--valid-for must be at least 1 minute")
+
+    if not args.verbose:
+        ADAM.app.logger.removeHandler(default_handler)
+
+    jobs = load_jobs(args.source, args)
+    done = load_checkpoint(args.checkpoint)
+    todo = []
+    failures = []
+    skipped = 0
+    for job in jobs:
+        if job['key'] in done:
+            skipped += 1
+            continue
+        problem = check_job(job)
+        if problem:
+            failures.append(('input', job['key'], problem))
+        else:
+            todo.append(job)
+    print(f"{len(jobs)} jobs, {skipped} already done, {len(todo)} to run")
+    print(f"Each quiz expires {args.valid_for or ADAM.SESSION_MINUTES} minutes after it is written.")
+
+    stats, created, run_failures = run(todo, args)
+    failures.extend(run_failures)
+    report(stats, created, skipped, failures)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
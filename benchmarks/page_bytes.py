@@ -0,0 +1,113 @@
+"""Bytes on the wire for the student quiz flow (/student/ -> /quiz/).
+
+Runs the app with Flask's test client against a throwaway copy of
+database.db and reports, per page, the HTML size uncompressed and with
+the negotiated Content-Encoding, plus the linked static assets on a
+first (cold cache) and repeat (warm cache) visit.
+
+    python benchmarks/page_bytes.py [--encoding br|gzip|identity]
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ASSET_RE = re.compile(r'(?:href|src)="(/static/[^"]+)"')
+
+
+def sample_quiz(n=10):
+    return json.dumps([
+        {
+            "question": f"Sample question {i}: which option is correct?",
+            "options": [
+                {"text": f"Option {c}", "rationale": f"Rationale for option {c}.", "correct": c == "B"}
+                for c in "ABCD"
+            ],
+        }
+        for i in range(1, n + 1)
+    ])
+
+
+def setup_app(workdir):
+    shutil.copy(os.path.join(ROOT, "database.db"), workdir)
+    os.chdir(workdir)
+    sys.path.insert(0, ROOT)
+    import ADAM
+    ADAM.app.logger.disabled = True
+    ADAM.add_quiz(("QZ_BENCH", sample_quiz(), "Benchmarking", "Bench", "CLS_BENCH"))
+    return ADAM.app
+
+
+def measure(client, path, encoding, method="GET", data=None):
+    headers = {"Accept-Encoding": encoding}
+    resp = client.open(path, method=method, data=data, headers=headers, follow_redirects=False)
+    return resp
+
+
+def page_report(client, html_path, encoding, method="GET", data=None):
+    resp = measure(client, html_path, encoding, method, data)
+    if resp.status_code in (301, 302, 303):
+        resp = measure(client, resp.headers["Location"], encoding)
+    wire = len(resp.get_data())
+    raw = resp.get_data()
+    if resp.headers.get("Content-Encoding") == "gzip":
+        import gzip
+        raw = gzip.decompress(raw)
+    elif resp.headers.get("Content-Encoding") == "br":
+        import brotli
+        raw = brotli.decompress(raw)
+    html = raw.decode()
+
+    cold = warm = 0
+    for url in sorted(set(ASSET_RE.findall(html))):
+        asset = measure(client, url, encoding)
+        cold += len(asset.get_data())
+        cache_control = asset.headers.get("Cache-Control", "")
+        if "immutable" in cache_control:
+            continue  # served from browser cache, no request at all
+        etag = asset.headers.get("ETag")
+        again = client.get(url, headers={"Accept-Encoding": encoding, "If-None-Match": etag or ""})
+        warm += len(again.get_data())
+    return {
+        "page": html_path,
+        "html_raw": len(raw),
+        "html_wire": wire,
+        "encoding": resp.headers.get("Content-Encoding", "identity"),
+        "assets_cold": cold,
+        "assets_warm": warm,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--encoding", default="br, gzip")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="adam-bench-")
+    try:
+        app = setup_app(workdir)
+        client = app.test_client()
+        rows = [
+            page_report(client, "/student/", args.encoding),
+            page_report(client, "/student/", args.encoding, "POST", {"quizID": "QZ_BENCH"}),
+        ]
+        rows[1]["page"] = "/quiz/"
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{'page':<12}{'enc':>10}{'html raw':>10}{'html wire':>11}{'assets cold':>13}{'assets warm':>13}")
+    for r in rows:
+        print(f"{r['page']:<12}{r['encoding']:>10}{r['html_raw']:>10}{r['html_wire']:>11}"
+              f"{r['assets_cold']:>13}{r['assets_warm']:>13}")
+    first = sum(r["html_wire"] + r["assets_cold"] for r in rows)
+    repeat = sum(r["html_wire"] + r["assets_warm"] for r in rows)
+    print(f"\nstudent flow total: first visit {first} B, repeat visit {repeat} B")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Requests per second for the constant pages and error handlers.
+
+Drives the app in-process with Flask's test client against a throwaway copy
+of database.db, so the numbers cover routing, rendering, compression and the
+log write, not the network. Each page is timed three ways: rendered on every
+request (the old render_template path), served from the page cache, and
+revalidated with If-None-Match (a 304 with no body).
+
+    python benchmarks/page_rps.py [--requests 2000] [--encoding "br, gzip"]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = ["/", "/instructions/", "/teacher/", "/student/", "/teacher-login/", "/create-quiz/", "/no-such-page/"]
+
+
+def setup_app(workdir):
+    shutil.copy(os.path.join(ROOT, "database.db"), workdir)
+    os.chdir(workdir)
+    sys.path.insert(0, ROOT)
+    import ADAM
+    from flask.logging import default_handler
+    # keep the file log (part of the per-request cost) but not the console echo
+    ADAM.app.logger.removeHandler(default_handler)
+    return ADAM
+
+
+def rate(client, path, n, headers):
+    client.get(path, headers=headers)
+    started = time.perf_counter()
+    for _ in range(n):
+        client.get(path, headers=headers)
+    return n / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--encoding", default="br, gzip")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="adam-bench-")
+    try:
+        ADAM = setup_app(workdir)
+        client = ADAM.app.test_client()
+        headers = {"Accept-Encoding": args.encoding}
+        cached_page = ADAM.cached_page
+
+        def render_every_time(template, status=200, **context):
+            return ADAM.render_template(template, **context), status
+
+        rows = []
+        for path in PAGES:
+            ADAM.cached_page = render_every_time
+            rendered = rate(client, path, args.requests, headers)
+            ADAM.cached_page = cached_page
+            cached = rate(client, path, args.requests, headers)
+            etag = client.get(path, headers=headers).headers.get("ETag")
+            revalidated = rate(client, path, args.requests, dict(headers, **{"If-None-Match": etag})) if etag else None
+            rows.append((path, rendered, cached, revalidated))
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{'page':<16}{'rendered/s':>12}{'cached/s':>12}{'304/s':>10}{'speedup':>9}")
+    for path, rendered, cached, revalidated in rows:
+        print(f"{path:<16}{rendered:>12.0f}{cached:>12.0f}{(f'{revalidated:.0f}' if revalidated else '-'):>10}"
+              f"{cached / rendered:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""End-of-quiz write throughput against the number of SQLite shards.
+
+Simulates many classes finishing at once: worker threads call
+submit_quiz() for random students of random classes, each insert in its
+own transaction as in the /quiz/ route. With one file every commit waits
+on the same lock; with N shards unrelated classes commit in parallel.
+
+    python benchmarks/shard_writes.py [--shards 0 1 2 4 8] [--workers 16]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(ADAM, shards, classes, workers, writes):
+    workdir = tempfile.mkdtemp(prefix="adam-shards-")
+    os.chdir(workdir)
+    try:
+        ADAM.DB_SHARDS = shards
+        ADAM.init_storage()
+        class_ids = [f"CLS_B{n:04d}" for n in range(classes)]
+        for classDB in class_ids:
+            ADAM.create_temp_table(classDB)
+
+        errors = []
+
+        def worker(seed):
+            rng = random.Random(seed)
+            for n in range(writes):
+                classDB = rng.choice(class_ids)
+                try:
+                    ADAM.submit_quiz((f"S{seed}_{n}", "Bench Student", 10, rng.randint(0, 10)), classDB)
+                except Exception as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        return workers * writes - len(errors), elapsed, len(errors)
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shards", type=int, nargs="+", default=[0, 1, 2, 4, 8], help="0 = single database.db")
+    parser.add_argument("--classes", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--writes", type=int, default=200, help="submissions per worker")
+    args = parser.parse_args()
+
+    # importing ADAM creates logs/ and uploaded_pdfs/ in the cwd
+    scratch = tempfile.mkdtemp(prefix="adam-import-")
+    os.chdir(scratch)
+    sys.path.insert(0, ROOT)
+    import ADAM
+    ADAM.app.logger.disabled = True
+    os.chdir(ROOT)
+    shutil.rmtree(scratch, ignore_errors=True)
+
+    print(f"{'shards':>6}{'writes':>9}{'seconds':>10}{'writes/s':>11}{'errors':>8}")
+    baseline = None
+    for shards in args.shards:
+        done, elapsed, errors = run(ADAM, shards, args.classes, args.workers, args.writes)
+        rate = done / elapsed
+        baseline = baseline or rate
+        print(f"{shards:>6}{done:>9}{elapsed:>10.2f}{rate:>11.0f}{errors:>8}   x{rate / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
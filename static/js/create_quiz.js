@@ -0,0 +1,238 @@
+    document.getElementById("timezone").value =  Intl.DateTimeFormat().resolvedOptions().timeZone;
+
+document.querySelector("#setup-form").addEventListener("submit", function () {
+  document.getElementById("timezone").value =
+    Intl.DateTimeFormat().resolvedOptions().timeZone;
+});
+
+
+    // --- STATE VARIABLES ---
+    let currentStep = 1;
+
+    // --- DOM ELEMENTS ---
+    const stepViews = {
+        1: document.getElementById('step-1'),
+        2: document.getElementById('step-2'),
+        'loader': document.getElementById('step-loader'),
+        3: document.getElementById('step-3')
+    };
+    const currentStepNumber = document.getElementById('current-step-number');
+    const toast = document.getElementById('toast-notification');
+    const form = document.getElementById('setup-form');
+
+    // Regex for basic email validation
+    const emailRegex = /^[^\s@]+@[^\s@]+\.[^\s@]+$/;
+
+    // --- UTILITY FUNCTIONS ---
+
+    /** Shows a custom toast notification instead of alert() */
+    function showToast(message, isError = false) {
+        // Clear previous classes
+        toast.className = '';
+        toast.textContent = message;
+
+        // Add error class if necessary
+        if (isError) {
+            toast.classList.add('error');
+        }
+
+        toast.style.display = 'block';
+
+        // Use a slight delay for the transition to be visible
+        setTimeout(() => {
+            toast.style.opacity = '1';
+        }, 10);
+
+        // Hide after 3 seconds
+        setTimeout(() => {
+            toast.style.opacity = '0';
+            setTimeout(() => {
+                toast.style.display = 'none';
+            }, 500); // Wait for fade-out before setting display: none
+        }, 3000);
+    }
+
+    /** Generates a simple pseudo-unique ID (Used for simulation) */
+    function generateUniqueId(prefix) {
+        const randomPart = Math.random().toString(36).substring(2, 6).toUpperCase();
+        return `${prefix}-${Date.now().toString().slice(-5)}${randomPart}`;
+    }
+
+    /** Copies text from a DOM element to the clipboard */
+    function copyToClipboard(elementId, type) {
+        const textToCopy = document.getElementById(elementId).textContent;
+        const tempInput = document.createElement('textarea');
+        tempInput.value = textToCopy;
+        document.body.appendChild(tempInput);
+        tempInput.select();
+
+        try {
+            document.execCommand('copy');
+            showToast(`${type} copied to clipboard!`);
+        } catch (err) {
+            showToast('Could not copy to clipboard. Please select and copy manually.', true);
+        }
+        document.body.removeChild(tempInput);
+    }
+
+    // --- VIEW MANAGEMENT FUNCTIONS ---
+
+    function changeStep(newStep) {
+        // Determine the actual step number for display (Loader is step 3, Final is step 4)
+        const stepNum = (newStep === 'loader' ? 3 : (newStep === 3 ? 4 : newStep));
+
+        // Hide all views
+        Object.values(stepViews).forEach(view => {
+            view.style.display = 'none';
+        });
+
+        // Show the target view
+        const targetView = (newStep === 'loader') ? stepViews.loader : stepViews[newStep];
+        targetView.style.display = 'block';
+
+        // Update step number display
+        currentStep = newStep;
+        currentStepNumber.textContent = stepNum;
+
+        // Update the back link visibility based on the step
+        const backLink = document.querySelector('.back-link a');
+        if (currentStep === 1) {
+             // Link to teacher dashboard (uses Flask url_for)
+             backLink.href = backLink.dataset.portalUrl;
+        } else {
+             backLink.href = 'javascript:void(0);';
+        }
+    }
+
+    function validateStep1() {
+        const fname = document.getElementById('teacher-fname').value.trim();
+        const lname = document.getElementById('teacher-lname').value.trim();
+        const email = document.getElementById('teacher-email').value.trim();
+
+        if (!fname || !lname || !email) {
+            showToast('Please fill in all teacher details.', true);
+            return false;
+        }
+
+        // NEW: Email format validation
+        if (!emailRegex.test(email)) {
+            showToast('Please enter a valid email address (e.g., user@domain.com).', true);
+            return false;
+        }
+        return true;
+    }
+
+    function validateStep2() {
+        const title = document.getElementById('quiz-title').value.trim();
+        const uploadFile = document.getElementById('quiz-upload').files.length;
+        const topics = document.getElementById('quiz-topics').value.trim();
+
+        if (!title) {
+            showToast('Please provide a Quiz Subject Name.', true);
+            return false;
+        }
+
+        // NEW: Content Requirement - MUST have EITHER file upload OR topics entered
+        if (uploadFile === 0 && !topics) {
+            showToast('Please either **Upload a Document (PDF)** or **Enter Topics (Comma Separated)** to define the quiz content.', true);
+            return false;
+        }
+        return true;
+    }
+
+    function backStep() {
+        if (currentStep === 2) {
+            changeStep(1);
+        }
+        // Logic for currentStep 1 is handled by the back link's data-portal-url
+    }
+
+    function nextStep(step) {
+        if (step === 2) {
+            if (!validateStep1()) return;
+        }
+        // Note: nextStep(3) is now replaced by the form submission handler
+        changeStep(step);
+    }
+
+    /** Handles the form submission (Step 2 -> Loader -> Step 3) */
+    form.addEventListener('submit', function(event) {
+        event.preventDefault(); // Stop default form submission
+
+        if (!validateStep2()) {
+            return;
+        }
+
+        // 1. Show Loader Screen
+        changeStep('loader');
+
+        // 2. Collect Data (FormData collects both files and text fields with 'name' attributes)
+        const formData = new FormData(form);
+
+        // 3. Send Data to Flask Backend using Fetch API
+        const flaskTargetUrl = form.getAttribute('action');
+
+        fetch(flaskTargetUrl, {
+            method: 'POST',
+            body: formData, // FormData handles text and files correctly
+        })
+        .then(response => {
+            if (!response.ok) {
+                // If the server returns an error status (e.g., 400 or 500)
+                // We attempt to read the error message if it's JSON, otherwise throw a generic error.
+                return response.json().catch(() => {
+                    throw new Error('Server returned an unexpected error.');
+                });
+            }
+            return response.json(); // Assuming Flask returns JSON
+        })
+        .then(data => {
+            if (data.success) {
+                // 4. Update Final Step View with real IDs from Flask
+                document.getElementById('teacher-id-display').textContent = data.teacher_id;
+                document.getElementById('quiz-id-display').textContent = data.quiz_id;
+
+                // 5. Move to Final Step
+                changeStep(3);
+                showToast('Quiz successfully created!', false);
+            } else {
+                // Handle application-level errors (e.g., validation failed in Flask)
+                changeStep(2); // Go back to quiz details
+                showToast(data.message || 'Quiz generation failed. Check your inputs.', true);
+            }
+        })
+        .catch(error => {
+            console.error('Submission Error:', error);
+            changeStep(2); // Go back to step 2 on network/fetch error
+            showToast('A network error occurred during creation. Please check your connection.', true);
+        });
+    });
+
+
+    function restartSetup() {
+        // Clear all inputs and reset state
+        document.getElementById('teacher-fname').value = '';
+        document.getElementById('teacher-lname').value = '';
+        document.getElementById('teacher-email').value = '';
+        document.getElementById('quiz-title').value = '';
+        document.getElementById('quiz-topics').value = '';
+        // Reset file input by setting value to empty string
+        document.getElementById('quiz-upload').value = '';
+
+        changeStep(1);
+    }
+
+    // Set the current year in the footer
+    function setFooterYear() {
+        const yearElement = document.getElementById('current-year');
+        if (yearElement) {
+            yearElement.textContent = new Date().getFullYear();
+        }
+    }
+
+
+    // --- INITIALIZATION ---
+    window.onload = () => {
+        changeStep(1); // Start on the first step
+        setFooterYear();
+    };
@@ -0,0 +1,43 @@
+// Array of Font Awesome classes (COPIED FROM ORIGINAL)
+const ICON_CLASSES = [
+    'fa-solid fa-microscope', 'fa-solid fa-flask', 'fa-solid fa-magnet', 'fa-solid fa-atom',
+    'fa-solid fa-flask-vial', 'fa-solid fa-vial', 'fa-solid fa-vials', 'fa-solid fa-biohazard',
+    'fa-solid fa-brain', 'fa-solid fa-capsules', 'fa-solid fa-circle-radiation',
+    'fa-solid fa-clipboard-check', 'fa-solid fa-dna', 'fa-solid fa-frog',
+    'fa-brands fa-galactic-republic', 'fa-solid fa-seedling', 'fa-brands fa-space-awesome',
+    'fa-solid fa-rocket', 'fa-solid fa-robot'
+];
+
+const BACKGROUND_ELEMENTS_COUNT = 45;
+const container = document.getElementById('doodle-bg');
+
+function getRandomInt(min, max) {
+    return Math.floor(Math.random() * (max - min + 1)) + min;
+}
+
+function createFloatingIcon() {
+    const iconElement = document.createElement('i');
+    const randomIconClass = ICON_CLASSES[getRandomInt(0, ICON_CLASSES.length - 1)];
+    iconElement.className = 'floating-icon ' + randomIconClass;
+
+    const size = getRandomInt(15, 40);
+    iconElement.style.fontSize = `${size}px`;
+    iconElement.style.left = `${getRandomInt(0, 100)}%`;
+    iconElement.style.bottom = `${getRandomInt(-50, -100)}px`;
+
+    const duration = getRandomInt(20, 50);
+    const delay = getRandomInt(0, 40);
+    iconElement.style.animation = `float-up ${duration}s linear ${delay}s infinite`;
+    iconElement.style.transform = `translateX(${getRandomInt(-50, 50)}px) rotate(${getRandomInt(0, 360)}deg)`;
+
+    container.appendChild(iconElement);
+}
+
+function initBackground() {
+    for (let i = 0; i < BACKGROUND_ELEMENTS_COUNT; i++) {
+        createFloatingIcon();
+    }
+    document.getElementById('current-year').textContent = new Date().getFullYear();
+}
+
+window.onload = initBackground;
@@ -0,0 +1,79 @@
+// Array of Font Awesome classes provided by the user
+const ICON_CLASSES = [
+    'fa-solid fa-microscope',
+    'fa-solid fa-flask',
+    'fa-solid fa-magnet',
+    'fa-solid fa-atom',
+    'fa-solid fa-flask-vial',
+    'fa-solid fa-vial',
+    'fa-solid fa-vials',
+    'fa-solid fa-biohazard',
+    'fa-solid fa-brain',
+    'fa-solid fa-capsules',
+    'fa-solid fa-circle-radiation',
+    'fa-solid fa-clipboard-check',
+    'fa-solid fa-dna',
+    'fa-solid fa-frog',
+    'fa-brands fa-galactic-republic',
+    'fa-solid fa-seedling',
+    'fa-brands fa-space-awesome',
+    'fa-solid fa-rocket',
+    'fa-solid fa-robot'
+];
+
+// Increased the count from 20 to 45 for a denser, more active background
+const BACKGROUND_ELEMENTS_COUNT = 45;
+const container = document.getElementById('doodle-bg');
+
+/**
+ * Generates a random integer between min (inclusive) and max (inclusive).
+ */
+function getRandomInt(min, max) {
+    return Math.floor(Math.random() * (max - min + 1)) + min;
+}
+
+/**
+ * Creates and styles a single floating icon element.
+ */
+function createFloatingIcon() {
+    const iconElement = document.createElement('i');
+
+    // 1. Assign a random icon class
+    const randomIconClass = ICON_CLASSES[getRandomInt(0, ICON_CLASSES.length - 1)];
+    iconElement.className = 'floating-icon ' + randomIconClass;
+
+    // 2. Random size
+    const size = getRandomInt(15, 40);
+    iconElement.style.fontSize = `${size}px`;
+
+    // 3. Random horizontal position (0% to 100% of screen width)
+    iconElement.style.left = `${getRandomInt(0, 100)}%`;
+
+    // 4. Initial vertical position (starting just below the screen)
+    // Ensures icons start completely below the fold.
+    iconElement.style.bottom = `${getRandomInt(-50, -100)}px`;
+
+    // 5. Random animation duration (to vary speeds) and delay (to stagger start)
+    const duration = getRandomInt(20, 50); // Seconds
+    const delay = getRandomInt(0, 40); // Seconds
+    iconElement.style.animation = `float-up ${duration}s linear ${delay}s infinite`;
+
+    // 6. Apply a slight random skew/rotation bias
+    iconElement.style.transform = `translateX(${getRandomInt(-50, 50)}px) rotate(${getRandomInt(0, 360)}deg)`;
+
+    container.appendChild(iconElement);
+}
+
+/**
+ * Initializes the dynamic background by generating all icons and setting the year.
+ */
+function initBackground() {
+    for (let i = 0; i < BACKGROUND_ELEMENTS_COUNT; i++) {
+        createFloatingIcon();
+    }
+    // Set current year in the footer
+    document.getElementById('current-year').textContent = new Date().getFullYear();
+}
+
+// Wait for the window to load before running the script
+window.onload = initBackground;
@@ -0,0 +1,423 @@
+    // --- DATA: Quiz Questions (fetched page by page, answer key stays on the server) ---
+    const quizData = [];
+    const totalQuestions = ADAM_QUIZ.total;
+    const pageRequests = {};
+
+    // --- STATE VARIABLES ---
+    let currentQuestionIndex = 0;
+    let score = 0;
+    let studentInfo = {};
+    let timerInterval = null;
+    let questionTimeLimitSeconds = 50;
+    let currentQuestionTime = questionTimeLimitSeconds;
+    let totalTimeSpentSeconds = 0;
+    let isQuizActive = false;
+    let allowNavigation = false;
+    let quizTerminated = false;
+
+    // --- DOM ELEMENTS ---
+    const views = {
+        details: document.getElementById('details-view'),
+        instructions: document.getElementById('instructions-view'),
+        student: document.getElementById('student-view'),
+        quiz: document.getElementById('quiz-view'),
+        results: document.getElementById('results-view')
+    };
+    const timerDisplay = document.getElementById('timer-display');
+    const timeRemainingSpan = document.getElementById('time-remaining');
+    const questionCountSpan = document.getElementById('q-count');
+    const backLinkElement = document.getElementById('back-to-portal-link');
+
+    // Student Inputs
+    const fNameInput = document.getElementById('fname-input');
+    const lNameInput = document.getElementById('lname-input');
+    const studentIdInput = document.getElementById('student-id-input');
+
+    // Quiz Elements
+    const questionText = document.getElementById('question-text');
+    const optionsList = document.getElementById('options-list');
+    const feedbackDiv = document.getElementById('feedback');
+    const nextBtn = document.getElementById('next-btn');
+    const progressDiv = document.getElementById('progress');
+
+    // Results Elements
+    const finalScore = document.getElementById('final-score');
+    const greeting = document.getElementById('student-greeting');
+    const timeTakenSpan = document.getElementById('time-taken');
+    const toast = document.getElementById('toast-notification');
+
+    /** Helper: Get CSS variable values */
+    function getCssVar(name) {
+        return getComputedStyle(document.body).getPropertyValue(name).trim();
+    }
+
+    // --- UTILITY FUNCTIONS ---
+
+
+
+    function showToast(message) {
+        toast.textContent = message;
+        toast.style.display = 'block';
+        toast.style.backgroundColor = getCssVar('--error-color');
+        setTimeout(() => { toast.style.opacity = '1'; }, 10);
+        setTimeout(() => {
+            toast.style.opacity = '0';
+            setTimeout(() => { toast.style.display = 'none'; }, 500);
+        }, 3000);
+    }
+
+    function formatTime(seconds) {
+        const minutes = Math.floor(seconds / 60);
+        const secs = seconds % 60;
+        return `${minutes.toString().padStart(2, '0')}:${secs.toString().padStart(2, '0')}`;
+    }
+
+    function changeView(activeViewId) {
+        Object.values(views).forEach(view => {
+            view.style.display = 'none';
+        });
+        views[activeViewId].style.display = 'block';
+
+        isQuizActive = (activeViewId === 'quiz');
+        timerDisplay.style.display = isQuizActive ? 'block' : 'none';
+
+        if (backLinkElement) {
+            backLinkElement.style.display = (activeViewId === 'quiz') ? 'none' : 'block';
+        }
+    }
+
+    // --- BEACON SUBMISSION ---
+    function silentSubmit() {
+        if (isQuizActive) {
+            stopTimer();
+            isQuizActive = false;
+
+            const studentName = `${studentInfo.fName || ''} ${studentInfo.lName || ''}`;
+            const studentID = studentInfo.studentId || "N/A";
+
+            const data = new FormData();
+            data.append('student_id', studentID);
+            data.append('student_name', studentName);
+            data.append('submission_type', 'abandoned');
+
+            navigator.sendBeacon(ADAM_QUIZ.submitUrl, data);
+        }
+    }
+
+    // --- VIEW LOGIC ---
+
+    function showInstructions() {
+    changeView('instructions');
+}
+
+    function showDetails() {
+        questionCountSpan.textContent = totalQuestions;
+        changeView('details');
+    }
+
+    function showStudentInput() {
+        changeView('student');
+    }
+
+    function startQuiz() {
+        const fName = fNameInput.value.trim();
+        const lName = lNameInput.value.trim();
+        const studentId = studentIdInput.value.trim();
+
+        if (!fName || !lName || !studentId) {
+            showToast("Please fill in all student details to start the assessment.");
+            return;
+        }
+
+        studentInfo = { fName, lName, studentId };
+        currentQuestionIndex = 0;
+        score = 0;
+        totalTimeSpentSeconds = 0;
+        allowNavigation = false;
+
+        changeView('quiz');
+        loadQuestion();
+    }
+
+    function startTimer() {
+        stopTimer();
+        currentQuestionTime = questionTimeLimitSeconds;
+        timeRemainingSpan.textContent = formatTime(currentQuestionTime);
+        timerDisplay.classList.remove('low-time');
+        timerDisplay.style.backgroundColor = getCssVar('--success-color');
+
+        timerInterval = setInterval(() => {
+            currentQuestionTime--;
+            totalTimeSpentSeconds++;
+
+            if (currentQuestionTime < 0) {
+                stopTimer();
+                checkAnswer(null, null, true);
+                showToast(`Time expired for Question ${currentQuestionIndex + 1}.`);
+                return;
+            }
+
+            timeRemainingSpan.textContent = `00:${currentQuestionTime.toString().padStart(2, '0')}`;
+
+            if (currentQuestionTime <= 10) {
+                timerDisplay.classList.add('low-time');
+                timerDisplay.style.backgroundColor = getCssVar('--error-color');
+            } else {
+                timerDisplay.classList.remove('low-time');
+                timerDisplay.style.backgroundColor = getCssVar('--success-color');
+            }
+        }, 1000);
+    }
+
+    function stopTimer() {
+        if (timerInterval) {
+            clearInterval(timerInterval);
+            timerInterval = null;
+        }
+    }
+
+    // --- SERVER API ---
+    function fetchPage(page) {
+        if (!pageRequests[page]) {
+            pageRequests[page] = fetch(`${ADAM_QUIZ.questionsUrl}?page=${page}&size=${ADAM_QUIZ.pageSize}`, { credentials: 'same-origin' })
+                .then(resp => {
+                    if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+                    return resp.json();
+                })
+                .then(body => {
+                    body.questions.forEach(q => { quizData[q.index] = q; });
+                    return body;
+                })
+                .catch(err => {
+                    delete pageRequests[page];
+                    throw err;
+                });
+        }
+        return pageRequests[page];
+    }
+
+    function ensureQuestion(index) {
+        if (quizData[index]) return Promise.resolve(quizData[index]);
+        return fetchPage(Math.floor(index / ADAM_QUIZ.pageSize)).then(() => quizData[index]);
+    }
+
+    function prefetchQuestion(index) {
+        if (index < totalQuestions && !quizData[index]) {
+            ensureQuestion(index).catch(() => {});
+        }
+    }
+
+    function submitAnswer(index, choice) {
+        return fetch(ADAM_QUIZ.answersUrl, {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ answers: [{ index, choice }] })
+        }).then(resp => {
+            if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+            return resp.json();
+        });
+    }
+
+    function loadQuestion() {
+        progressDiv.innerText = `Question ${currentQuestionIndex + 1} of ${totalQuestions}`;
+        questionText.innerHTML = 'Loading...';
+
+        optionsList.innerHTML = '';
+        feedbackDiv.style.display = 'none';
+        nextBtn.style.display = 'none';
+
+        ensureQuestion(currentQuestionIndex).then(currentData => {
+            questionText.innerHTML = currentData.question;
+            currentData.answered = false;
+            currentData.timeTaken = 0;
+
+            currentData.options.forEach((optText, index) => {
+                const btn = document.createElement('button');
+                btn.className = 'option-btn';
+                const prefix = String.fromCharCode(65 + index);
+                btn.innerHTML = `<span style="font-weight: 700; margin-right: 10px; color: ${getCssVar('--accent-color')};">${prefix}.</span> ${optText}`;
+                btn.onclick = () => checkAnswer(index, btn, false);
+                optionsList.appendChild(btn);
+            });
+
+            startTimer();
+            prefetchQuestion(currentQuestionIndex + 1);
+        }).catch(() => {
+            if (!isQuizActive) return;
+            questionText.innerHTML = 'Could not load the question. Retrying...';
+            setTimeout(loadQuestion, 2000);
+        });
+    }
+
+    function nextQuestion() {
+        currentQuestionIndex++;
+        if (currentQuestionIndex < totalQuestions) {
+            loadQuestion();
+        } else {
+            finishQuiz();
+        }
+    }
+
+    function checkAnswer(selectedIndex, btnElement, isTimeout) {
+        stopTimer();
+        const currentData = quizData[currentQuestionIndex];
+        if (!currentData || currentData.answered) return;
+        currentData.timeTaken = questionTimeLimitSeconds - (isTimeout ? 0 : currentQuestionTime);
+
+        const allBtns = document.querySelectorAll('.option-btn');
+        allBtns.forEach(b => b.disabled = true);
+        currentData.answered = true;
+
+        const send = () => submitAnswer(currentData.index, isTimeout ? -1 : selectedIndex).then(body => {
+            const result = body.results[0];
+            score = body.score;
+            currentData.studentChoice = result.choice;
+            currentData.isCorrect = result.correct;
+
+            if (result.choice === -1) {
+                feedbackDiv.innerHTML = `<strong>Time Out!</strong> You did not answer in time.`;
+                allBtns.forEach(b => b.classList.add('incorrect'));
+            } else if (result.correct) {
+                allBtns[result.choice].classList.add('correct');
+                feedbackDiv.innerHTML = `<strong>Correct!</strong> ${result.rationale}`;
+            } else {
+                allBtns[result.choice].classList.add('incorrect');
+                if (result.correct_option !== null) allBtns[result.correct_option].classList.add('correct');
+                feedbackDiv.innerHTML = `<strong>Incorrect.</strong> Rationale: ${result.rationale}`;
+            }
+
+            feedbackDiv.style.display = 'block';
+
+            if (currentQuestionIndex < totalQuestions - 1) {
+                nextBtn.textContent = 'Next Question ';
+                nextBtn.innerHTML += '<i class="fas fa-chevron-right"></i>';
+            } else {
+                nextBtn.textContent = 'Finish Assessment ';
+                nextBtn.innerHTML += '<i class="fas fa-check-circle"></i>';
+            }
+            nextBtn.style.display = 'block';
+        }).catch(() => {
+            showToast("Could not reach the server, retrying...");
+            setTimeout(send, 2000);
+        });
+        send();
+    }
+
+    function finishQuiz() {
+        stopTimer();
+        isQuizActive = false;
+        allowNavigation = true;
+
+        changeView('results');
+
+        const fName = studentInfo.fName || 'Student';
+        const totalTime = formatTime(totalTimeSpentSeconds);
+
+        greeting.innerText = `Thank you for completing the assessment, ${fName} ${studentInfo.lName || ''}!`;
+        finalScore.innerText = `${score} / ${totalQuestions}`;
+
+        // Visual color logic
+        const passed = score > (totalQuestions / 2);
+        finalScore.style.color = passed ? getCssVar('--success-color') : getCssVar('--error-color');
+
+        timeTakenSpan.innerText = `Total time spent: ${totalTime}`;
+        timeTakenSpan.style.color = getCssVar('--accent-color');
+
+        // Populate Hidden Form
+        document.getElementById('stID-hidden').value = studentInfo.studentId;
+        document.getElementById('stName-hidden').value = `${studentInfo.fName} ${studentInfo.lName}`;
+
+        setTimeout(() => {
+            console.log("Data ready. Auto-generating PDF...");
+            // auto-submit to server after PDF:
+            downloadReport().finally(() => document.getElementById('quiz-results-form').submit());
+        }, 500);
+    }
+
+    // --- REVISED BEAUTIFUL REPORT GENERATION ---
+
+    function downloadReport() {
+        // the PDF is built server-side from the recorded answers
+        return fetch(ADAM_QUIZ.reportUrl, {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                student_name: `${studentInfo.fName} ${studentInfo.lName}`,
+                student_id: studentInfo.studentId,
+                duration: totalTimeSpentSeconds
+            })
+        })
+            .then(res => {
+                if (!res.ok) throw new Error(`Report request failed: ${res.status}`);
+                return res.blob();
+            })
+            .then(blob => {
+                const link = document.createElement('a');
+                link.href = URL.createObjectURL(blob);
+                link.download = `Report_${studentInfo.fName}_${studentInfo.lName}.pdf`;
+                document.body.appendChild(link);
+                link.click();
+                link.remove();
+                setTimeout(() => URL.revokeObjectURL(link.href), 1000);
+            })
+            .catch(err => {
+                console.error(err);
+                showToast('Could not generate the PDF report.');
+            });
+    }
+
+    function restartQuiz() {
+        currentQuestionIndex = 0;
+        score = 0;
+        studentInfo = {};
+        totalTimeSpentSeconds = 0;
+        isQuizActive = false;
+        stopTimer();
+
+        fNameInput.value = '';
+        lNameInput.value = '';
+        studentIdInput.value = '';
+
+        showDetails();
+    }
+
+    // --- NEW HANDLER FUNCTION ---
+// --- MODIFIED HANDLER FUNCTION (Immediate Penalty) ---
+function handleVisibilityChange() {
+    // Only proceed if a question is on screen and the document is hidden (tab switch)
+    if (isQuizActive && document.hidden && timerInterval) {
+
+        console.warn("Tab switch detected. Forcing current question timeout.");
+
+        // 1. Ensure timer is stopped
+        stopTimer();
+
+        // 2. Immediately call checkAnswer() with the isTimeout flag set to true.
+        //    This marks the question as a timeout/unanswered and advances to the next question.
+        checkAnswer(null, null, true);
+
+        // 3. Show a notification of the penalty
+        showToast("Current question expired instantly due to tab switch.");
+
+        // NOTE: Since the question advances via checkAnswer(), the student will immediately
+        // start the timer on the next question when they return to the quiz tab.
+    }
+}
+
+    // --- BROWSER NAVIGATION HANDLERS ---
+    window.onbeforeunload = function(event) {
+        if (isQuizActive && !allowNavigation) {
+            event.preventDefault();
+            event.returnValue = 'Quiz running. Exit?';
+            return event.returnValue;
+        }
+    };
+    window.addEventListener('unload', silentSubmit);
+    window.addEventListener('pagehide', silentSubmit);
+    window.addEventListener('visibilitychange', handleVisibilityChange);
+    // --- INIT ---
+    window.onload = () => {
+        showDetails();
+    };
@@ -0,0 +1,42 @@
+// Custom replacement for alert() to show a toast message
+function showToast(message, isError = false) {
+    const toast = document.createElement('div');
+    toast.textContent = message;
+
+    // Set up styles for the toast notification
+    toast.style.cssText = `
+        position: fixed;
+        bottom: 20px;
+        left: 50%;
+        transform: translateX(-50%);
+        background-color: ${isError ? '#dc3545' : '#28a745'};
+        color: white;
+        padding: 15px 25px;
+        border-radius: 10px;
+        box-shadow: 0 4px 15px rgba(0, 0, 0, 0.3);
+        z-index: 100;
+        opacity: 0;
+        transition: opacity 0.5s ease;
+        font-weight: 500;
+        cursor: pointer;
+    `;
+    document.body.appendChild(toast);
+
+    // Show toast
+    setTimeout(() => {
+        toast.style.opacity = '1';
+    }, 10);
+
+    // Hide toast after 3 seconds or on click
+    const hideToast = () => {
+        toast.style.opacity = '0';
+        setTimeout(() => {
+            if (toast.parentNode) {
+                document.body.removeChild(toast);
+            }
+        }, 500);
+    };
+
+    toast.addEventListener('click', hideToast);
+    setTimeout(hideToast, 3000);
+}